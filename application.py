@@ -1,134 +1,125 @@
+import argparse
+import sys
+
 import numpy as np
 import sounddevice as sd
-import matplotlib.pyplot as plt
-from scipy.signal import windows
-
-# Custom Cooley–Tukey FFT function
-def cooley_tukey_fft(x):
-    N = len(x)
-    if N <= 1:
-        return x
-    if N % 2 != 0:
-        raise ValueError("Size of x must be a power of 2")
-
-    # Divide: even and odd indexed elements
-    even_fft = cooley_tukey_fft(x[::2])
-    odd_fft = cooley_tukey_fft(x[1::2])
-    
-    # Combine
-    factor = np.exp(-2j * np.pi * np.arange(N) / N)
-    return np.concatenate([even_fft + factor[:N // 2] * odd_fft,
-                           even_fft - factor[:N // 2] * odd_fft])
-
-# Function to pad the signal to the nearest power of 2
-def pad_to_power_of_two(signal):
-    N = len(signal)
-    next_power_of_two = 2**int(np.ceil(np.log2(N)))
-    padded_signal = np.zeros(next_power_of_two)
-    padded_signal[:N] = signal
-    return padded_signal
+
+from cooley_tukey import BandMapper, RingBuffer, ToneDetector, ring_callback
+from cooley_tukey.backends import add_backend_arguments, backend_from_args
+from cooley_tukey.bands import add_band_arguments
+from cooley_tukey.fir import add_filter_arguments, filter_from_args
+from cooley_tukey.instrument import add_profile_arguments, finish_profile, profiler_from_args
+from cooley_tukey.output import add_output_arguments, writer_from_args
+
+# --headless skips matplotlib entirely and writes one record per decision (JSON lines or binary)
+parser = add_output_arguments(argparse.ArgumentParser(description="Door unlock tone detector"))
+add_band_arguments(parser)
+add_profile_arguments(parser)
+add_backend_arguments(parser)
+add_filter_arguments(parser)  # e.g. --bandpass 900-3100 to drop hum and hiss before detection
+args = parser.parse_args()
+writer = writer_from_args(args, peaks=3)
+profiler = profiler_from_args(args)  # --profile: per-stage timing histograms (a no-op otherwise)
 
 # Audio settings
 fs = 44100  # Sampling rate
 n_fft = 2048  # Number of FFT points
-window = windows.hann(n_fft)  # Apply a Hann window to the segment
+# --precision float32 keeps the plot's window, FFT and bars in float32/complex64; the sliding
+# DFT stays in float64, since its recursive update would accumulate float32 rounding
+dtype = np.dtype(args.precision)
+window = np.hanning(n_fft).astype(dtype)  # Apply a Hann window to the segment (plot only)
 
-# Set up real-time plotting with subplots
-plt.ion()  # Turn on interactive mode
-fig, (ax, ax_table) = plt.subplots(2, 1, figsize=(12, 8), gridspec_kw={'height_ratios': [3, 1]})
+# Lock-free ring buffer filled by the audio callback; the detector consumes it one hop at a time
+hop = n_fft // 4  # 512 samples (about 12 ms) between decisions
+ring = RingBuffer(8 * n_fft)
+block = np.zeros(hop, dtype=ring.data.dtype)
+# --bandpass/--bandstop/--highpass: FIR pre-filter run in the audio callback, one hop at a time
+fir = filter_from_args(args, fs, block=hop, backend=args.backend)
 
-# FFT frequency bins up to Nyquist frequency
-freqs = np.fft.rfftfreq(n_fft, 1/fs)
+# Define target frequency ranges for door unlock
+target_frequencies = [1000, 2000, 3000]
+tolerance = 100  # ± tolerance in Hz
 
-# Shared data structure for live plotting
-audio_data = np.zeros(n_fft)
+# Sliding DFT over the last n_fft samples that only tracks the bins within ±tolerance of
+# each target; unlocks when all three tones stand out above the frame's noise floor
+detector = ToneDetector(fs, n_fft, target_frequencies, tolerance)
+decisions = 0
 
-# Audio callback function for real-time input
-def audio_callback(indata, frames, time, status):
-    global audio_data
-    if status:
-        print(status)
-    audio_data = indata[:, 0]  # Take the first channel
+# Focus on the 0 Hz to 6000 Hz range: 61 bars by default, each the mean of the bins in its band
+bars = BandMapper(n_fft, fs, args.bands, 0, 6000, layout=args.band_layout, dtype=dtype)
 
-# Start the audio stream for real-time input
-stream = sd.InputStream(callback=audio_callback, channels=1, samplerate=fs, blocksize=n_fft)
-stream.start()
+# Bars and table (3 tones plus the status row) are created once and redrawn with blitting;
+# the plot is only set up (and matplotlib only imported) when running with a display.
+# The full spectrum is computed only for the frames that are actually drawn.
+renderer = None
+if not args.headless:
+    from cooley_tukey.render import create_spectrum_plot
+    plan = backend_from_args(args).rfft_plan(n_fft, dtype)  # --backend custom/numpy/scipy/fastest
+    renderer = create_spectrum_plot(**bars.plot_options(), ylim=(0, 18),
+                                    title=f'Real-Time FFT Spectrum (0 Hz to 6000 Hz) with {bars.bands} Bars',
+                                    col_labels=("Frequency", "Amplitude"), rows=4)
 
-# Define target frequency ranges for door unlock
-target_frequencies = [1000, 2000, 3000]
-tolerance = 100  # ± tolerance in Hz
+# Start the audio stream for real-time input once the plot exists, so the ring does not
+# fill up while matplotlib starts (the callback appends the first channel to the ring)
+stream = sd.InputStream(callback=ring_callback(ring, profiler=profiler, fir=fir), channels=1, samplerate=fs, blocksize=hop)
+stream.start()
 
 try:
     while True:
-        # Apply window function and pad the segment to the nearest power of 2
-        segment = audio_data * window
-        padded_segment = pad_to_power_of_two(segment)
-        
-        # Apply custom Cooley–Tukey FFT
-        fft_values = np.abs(cooley_tukey_fft(padded_segment)[:len(padded_segment) // 2 + 1])
-        
-        # Apply smoothing (moving average) for visualization
-        smoothed_fft_values = np.convolve(fft_values, np.ones(5)/5, mode='same')
-        
-        # Focus on the 0 Hz to 6000 Hz range
-        valid_indices = (freqs >= 0) & (freqs <= 6000)
-        freqs_focus = freqs[valid_indices]
-        fft_values_focus = smoothed_fft_values[valid_indices]
-        
-        # Reduce data to 61 points for better visualization
-        indices = np.linspace(0, len(freqs_focus) - 1, 61, dtype=int)
-        reduced_freqs = freqs_focus[indices]
-        reduced_fft_values = fft_values_focus[indices]
-        
-        # Find the top 3 frequency-amplitude pairs
-        top_indices = np.argsort(reduced_fft_values)[-3:][::-1]
-        top_freqs = reduced_freqs[top_indices]
-        
-        # Debug: Print the top detected frequencies and check for matches
-        print("Top Detected Frequencies:")
-        matching_frequencies = []
-        for top_freq in top_freqs:
-            matched = any(abs(top_freq - target) <= tolerance for target in target_frequencies)
-            if matched:
-                matching_frequencies.append(top_freq)
-            print(f"  Frequency: {top_freq:.2f} Hz - Match: {'Yes' if matched else 'No'}")
-
-        # Unlock if we have at least three matching frequencies
-        unlock = len(matching_frequencies) >= 3
-        print(f"Unlock Status: {'Unlocked' if unlock else 'Locked'}")
-        
+        # Run the detector on every hop of new audio exactly once
+        decision = None
+        profiler.start()
+        while ring.available() >= hop:
+            ring.read(block)
+            decision = detector.process(block)
+            decisions += 1
+            profiler.lap('detect')
+            if writer is not None:
+                writer.write(decisions - 1, (decisions - 1) * hop / fs, decision.freqs, decision.amps,
+                             'unlocked' if decision.unlock else 'locked')
+                profiler.lap('output')
+        profiler.report_if_due()
+
+        if renderer is None:
+            if decision is None:
+                sd.sleep(5)
+            continue
+        if decision is None:
+            renderer.idle(0.005)
+            continue
+
+        # Debug: Print the strongest frequency near each target and the decision
+        print("Detected Frequencies:")
+        for freq, matched in zip(decision.freqs, decision.matches):
+            print(f"  Frequency: {freq:.2f} Hz - Match: {'Yes' if matched else 'No'}")
+        print(f"Unlock Status: {'Unlocked' if decision.unlock else 'Locked'}")
+        profiler.start()
+
         # Create data for the table with frequency, amplitude, and unlock status
-        table_data = [[f"{freq:.2f} Hz", f"{amp:.2f}"] for freq, amp in zip(top_freqs, reduced_fft_values[top_indices])]
-        
+        table_data = [[f"{freq:.2f} Hz", f"{amp:.2f}"] for freq, amp in zip(decision.freqs, decision.amps)]
+
         # Update "Status" row to have two columns
-        status = "Door Unlocked" if unlock else "Door Locked"
+        status = "Door Unlocked" if decision.unlock else "Door Locked"
         table_data.append(["Status", status])
-        
-        # Clear and update plots
-        ax.clear()
-        ax_table.clear()
-        
-        # Plot the FFT spectrum
-        ax.bar(reduced_freqs, reduced_fft_values, width=(reduced_freqs[1] - reduced_freqs[0]), align='center')
-        ax.set_xlim(0, 6000)
-        ax.set_ylim(0, 18)
-        ax.set_xlabel('Frequency (Hz)')
-        ax.set_ylabel('Amplitude')
-        ax.set_title('Real-Time FFT Spectrum (0 Hz to 6000 Hz) with 61 Bars')
-        
-        # Display the table
-        ax_table.axis('tight')
-        ax_table.axis('off')
-        table = ax_table.table(cellText=table_data, colLabels=["Frequency", "Amplitude"], loc='center')
-        table.auto_set_font_size(False)
-        table.set_fontsize(10)
-        table.scale(1, 1.5)
-        
-        plt.pause(0.1)
+
+        # Full spectrum of the current window, only when the plot is about to redraw
+        if renderer.due():
+            fft_values = np.abs(plan.execute(detector.window().astype(dtype) * window))  # Real-input FFT: N/2+1 bins
+            profiler.lap('fft')
+            renderer.update(bars(fft_values), table_data)
+            profiler.lap('bars')
+            renderer.draw()
+            profiler.lap('render')
 
 except KeyboardInterrupt:
-    print("Stopped by user")
+    print("Stopped by user", file=sys.stderr)
 finally:
     stream.stop()
-    plt.ioff()
-    plt.show()
+    print(f"decisions={decisions}, overruns={ring.overruns}, dropped={ring.dropped}, "
+          f"status_flags={ring.status_flags}", file=sys.stderr)
+    finish_profile(profiler, args)
+    if writer is not None:
+        writer.close()
+    if renderer is not None:
+        from cooley_tukey.render import show_final_plot
+        show_final_plot()
@@ -0,0 +1,67 @@
+import argparse
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+
+from cooley_tukey.analysis import DEFAULT_N_FFT, DEFAULT_PEAKS, analyze_to_file
+from cooley_tukey.backends import add_backend_arguments
+from cooley_tukey.channels import CHANNEL_AGGREGATES
+from cooley_tukey.parallel import set_default_threads
+
+# Expand the command-line inputs (directories, globs or files) into a sorted list of .wav files
+def collect_files(inputs):
+    files = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            files.update(glob.glob(os.path.join(item, '**', '*.wav'), recursive=True))
+        else:
+            files.update(glob.glob(item, recursive=True))
+    return sorted(files)
+
+parser = argparse.ArgumentParser(description="Run the chapter03 FFT / top-peak analysis over many wav files in parallel")
+parser.add_argument('inputs', nargs='+', help="directories, glob patterns or .wav files")
+parser.add_argument('-o', '--out-dir', default='analysis', help="directory for the per-file .npz results")
+parser.add_argument('-j', '--workers', type=int, default=os.cpu_count(), help="number of worker processes")
+parser.add_argument('--n-fft', type=int, default=DEFAULT_N_FFT)
+parser.add_argument('--hop', type=int, default=None, help="samples between frames (default: samplerate / 50)")
+parser.add_argument('--peaks', type=int, default=DEFAULT_PEAKS)
+parser.add_argument('--all-channels', action='store_true',
+                    help="analyse every channel (per-channel and aggregate peak columns) instead of the first")
+parser.add_argument('--aggregate', choices=CHANNEL_AGGREGATES, default='sum',
+                    help="cross-channel combination for the aggregate_* columns (with --all-channels)")
+add_backend_arguments(parser)
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    files = collect_files(args.inputs)
+    if not files:
+        parser.error("no .wav files found")
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    # Each worker reads, transforms and writes one file; only a small summary comes back
+    worker = partial(analyze_to_file, out_dir=args.out_dir, n_fft=args.n_fft, hop=args.hop, peaks=args.peaks,
+                     backend=args.backend, precision=args.precision,
+                     channel=None if args.all_channels else 0, aggregate=args.aggregate)
+    start = time.perf_counter()
+    audio_seconds = 0.0
+    failed = 0
+    # --threads sizes the thread pool of the parallel backend inside every worker process
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=set_default_threads,
+                             initargs=(args.threads,)) as pool:
+        futures = {pool.submit(worker, path): path for path in files}
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                path, out_path, frames, duration, seconds = future.result()
+            except Exception as error:
+                failed += 1
+                print(f"[{done}/{len(files)}] {futures[future]}: failed ({error})")
+                continue
+            audio_seconds += duration
+            print(f"[{done}/{len(files)}] {path} -> {out_path}: {frames} frames, "
+                  f"{duration / seconds:.0f}x real time")
+
+    elapsed = time.perf_counter() - start
+    print(f"{len(files) - failed} files, {audio_seconds:.0f} s of audio in {elapsed:.1f} s "
+          f"({audio_seconds / elapsed:.0f}x real time, {args.workers} workers)")
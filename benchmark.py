@@ -0,0 +1,362 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+
+import numpy as np
+import scipy.fft
+
+from cooley_tukey import (
+    BandMapper,
+    FFTPlan,
+    ToneDetector,
+    channel_peaks,
+    cooley_tukey_fft,
+    cooley_tukey_fft_recursive,
+    find_peaks,
+    get_rfft_plan,
+)
+from cooley_tukey.fir import FIRFilter
+from cooley_tukey.kernels import KERNELS
+from cooley_tukey.parallel import FOUR_STEP_MIN_SIZE, ParallelFFTPlan, get_parallel_rfft_plan
+
+# Benchmark suite: FFT engines per size and dtype, single-frame vs batched use, and the
+# per-frame pipelines of chapter05 and application without the GUI. Results are written
+# as JSON; with --baseline they are compared to an earlier run and any benchmark slower
+# than baseline * (1 + tolerance) makes the run exit with status 1.
+#   python benchmark.py -o baseline.json
+#   python benchmark.py --baseline baseline.json
+
+REAL_DTYPES = ('float32', 'float64')
+COMPLEX_DTYPES = ('complex64', 'complex128')
+
+# Frames per batch in the batched benchmarks, and the largest batch (frames * n) timed
+BATCH_FRAMES = 64
+MAX_BATCH_ELEMENTS = 2**20
+
+# The recursive reference is only timed where it finishes in reasonable time
+MAX_RECURSIVE_SIZE = 2**14
+
+# Thread-scaling runs: single four-step transforms from FOUR_STEP_MIN_SIZE up, and real-input
+# batches of PARALLEL_BATCH_ELEMENTS samples split into rows of every size up to the maximum
+PARALLEL_BATCH_ELEMENTS = 2**20
+PARALLEL_MAX_ROW = 2**14
+
+# FIR filtering: one second of audio fed in blocks of each size, for every filter length
+FIR_SIGNAL = 44100
+FIR_BLOCKS = (512, 4096)
+FIR_TAPS = (8, 16, 32, 48, 64, 96, 128, 256, 512, 1024, 2048)
+FIR_METHODS = (('direct', 'direct', None), ('overlap-save', 'overlap-save', None),
+               ('overlap-add', 'overlap-add', None), ('overlap-save-numpy', 'overlap-save', 'numpy'))
+
+# Complex engines: name -> factory(n, dtype) returning a one-argument transform
+COMPLEX_ENGINES = {
+    'cooley_tukey_fft': lambda n, dtype: cooley_tukey_fft,
+    **{f'plan-{kernel}': (lambda kernel: lambda n, dtype: FFTPlan(n, dtype, kernel=kernel).execute)(kernel)
+       for kernel in KERNELS},
+    'recursive': lambda n, dtype: cooley_tukey_fft_recursive if n <= MAX_RECURSIVE_SIZE else None,
+    'numpy': lambda n, dtype: np.fft.fft,
+    'scipy': lambda n, dtype: scipy.fft.fft,
+}
+
+# Real-input engines: name -> factory(n, dtype) returning a one-argument transform
+REAL_ENGINES = {
+    'rfft-plan': lambda n, dtype: get_rfft_plan(n, dtype).execute,
+    'numpy': lambda n, dtype: np.fft.rfft,
+    'scipy': lambda n, dtype: scipy.fft.rfft,
+}
+
+# Single-frame use of a plan over every row of a batch (plans return their own buffer,
+# so each result is copied out before the next row)
+def row_loop(plan, bins):
+    def transform(x):
+        out = np.empty((len(x), bins), dtype=plan.dtype)
+        for row, result in zip(x, out):
+            result[:] = plan.execute(row)
+        return out
+    return transform
+
+# Batched engines over a (frames x n) array: name -> factory(n, dtype)
+BATCH_ENGINES = {
+    'plan-batch': lambda n, dtype: FFTPlan(n, dtype).execute_batch,
+    'plan-loop': lambda n, dtype: row_loop(FFTPlan(n, dtype), n),
+    'numpy': lambda n, dtype: np.fft.fft,
+    'scipy': lambda n, dtype: scipy.fft.fft,
+}
+REAL_BATCH_ENGINES = {
+    'rfft-plan-batch': lambda n, dtype: get_rfft_plan(n, dtype).execute_batch,
+    'rfft-plan-loop': lambda n, dtype: row_loop(get_rfft_plan(n, dtype), n // 2 + 1),
+    'numpy': lambda n, dtype: np.fft.rfft,
+    'scipy': lambda n, dtype: scipy.fft.rfft,
+}
+
+# Best per-call time of fn: one warm-up call (plans, caches), then `repeat` runs of enough
+# calls to fill min_time seconds each; the minimum is the least noisy figure
+def measure(fn, repeat=5, min_time=0.02):
+    start = time.perf_counter()
+    fn()
+    once = time.perf_counter() - start
+    number = max(1, int(min_time / max(once, 1e-7)))
+    runs = timeit.repeat(fn, number=number, repeat=repeat)
+    return min(runs) / number, float(np.median(runs)) / number
+
+# Check an engine against numpy before timing it; float32 engines get a looser tolerance
+def check(name, result, reference, dtype):
+    result = np.asarray(result)
+    tolerance = 1e-3 if np.dtype(dtype) in (np.float32, np.complex64) else 1e-8
+    scale = np.max(np.abs(reference)) or 1.0
+    if not np.allclose(result, reference, rtol=tolerance, atol=tolerance * scale):
+        raise AssertionError(f"{name} does not match numpy")
+
+def test_signal(rng, shape, dtype):
+    x = rng.standard_normal(shape)
+    if np.dtype(dtype).kind == 'c':
+        x = x + 1j * rng.standard_normal(shape)
+    return x.astype(dtype)
+
+def engine_benchmarks(sizes, rng):
+    for dtype in COMPLEX_DTYPES + REAL_DTYPES:
+        engines = COMPLEX_ENGINES if dtype in COMPLEX_DTYPES else REAL_ENGINES
+        reference_fft = np.fft.fft if dtype in COMPLEX_DTYPES else np.fft.rfft
+        for n in sizes:
+            x = test_signal(rng, n, dtype)
+            reference = reference_fft(x.astype(np.result_type(dtype, np.float64)))
+            for engine, factory in engines.items():
+                transform = factory(n, dtype)
+                if transform is None:
+                    continue
+                run = (lambda transform, x: lambda: transform(x))(transform, x)
+                yield f"fft/{engine}/{dtype}/{n}", run, reference, dtype
+
+def batch_benchmarks(sizes, rng):
+    for dtype in COMPLEX_DTYPES + REAL_DTYPES:
+        engines = BATCH_ENGINES if dtype in COMPLEX_DTYPES else REAL_BATCH_ENGINES
+        reference_fft = np.fft.fft if dtype in COMPLEX_DTYPES else np.fft.rfft
+        for n in sizes:
+            frames = min(BATCH_FRAMES, MAX_BATCH_ELEMENTS // n)
+            if frames < 2:
+                continue
+            x = test_signal(rng, (frames, n), dtype)
+            reference = reference_fft(x.astype(np.result_type(dtype, np.float64)), axis=-1)
+            for engine, factory in engines.items():
+                transform = factory(n, dtype)
+                run = (lambda transform, x: lambda: transform(x))(transform, x)
+                yield f"batch/{engine}/{dtype}/{frames}x{n}", run, reference, dtype
+
+# One frame of the chapter05 pipeline: window, custom rfft, magnitude, bars, top-4 peaks
+def chapter05_frame(n_fft=2048, fs=44100, dtype=np.float64):
+    window = np.hanning(n_fft).astype(dtype)
+    plan = get_rfft_plan(n_fft, dtype)
+    bars = BandMapper(n_fft, fs, 61, 0, 6000, dtype=dtype)
+    peak_hi = int(6000 * n_fft / fs)
+    segment = np.random.default_rng(0).standard_normal(n_fft).astype(dtype)
+
+    def frame():
+        fft_values = np.abs(plan.execute(segment * window))
+        heights = bars(fft_values)
+        peak_bins, top_amps = find_peaks(fft_values, 4, min_distance=3, hi=peak_hi + 1)
+        return heights, peak_bins * (fs / n_fft), top_amps
+    return frame
+
+# One frame of chapter05 --channels: every channel in one batched rfft, per-channel and
+# summed peaks in one find_peaks_batch call, bars of the sum
+def chapter05_channels_frame(channels=4, n_fft=2048, fs=44100):
+    window = np.hanning(n_fft)
+    plan = get_rfft_plan(n_fft)
+    bars = BandMapper(n_fft, fs, 61, 0, 6000)
+    peak_hi = int(6000 * n_fft / fs)
+    segment = np.random.default_rng(0).standard_normal((channels, n_fft))
+
+    def frame():
+        spectra = np.abs(plan.execute_batch(segment * window))
+        result = channel_peaks(spectra, 4, 'sum', min_distance=3, hi=peak_hi + 1)
+        return bars(result.spectrum), result
+    return frame
+
+# Unlock decision of the original application for one frame: Hann window, FFT magnitude,
+# 5-bin moving average, 61 points of 0-6000 Hz, and all of the top 3 within tolerance of a target
+def top_peaks_unlock(frame, fs, targets, tolerance):
+    n = len(frame)
+    freqs = np.fft.rfftfreq(n, 1 / fs)
+    values = np.convolve(np.abs(np.fft.rfft(frame * np.hanning(n))), np.ones(5) / 5, mode='same')
+    focus = freqs <= 6000
+    points = np.linspace(0, focus.sum() - 1, 61, dtype=int)
+    top = freqs[focus][points][np.argsort(values[focus][points])[-3:]]
+    return all(any(abs(f - t) <= tolerance for t in targets) for f in top)
+
+# The detector's decisions on noisy key tones (the 4:2:1 mix of key_generator) must equal the
+# original top-3 peak test at every frame boundary, and noise alone must stay locked
+def check_tone_decisions(n_fft=2048, fs=44100, targets=(1000, 2000, 3000), tolerance=100, hop=512):
+    rng = np.random.default_rng(0)
+    t = np.arange(fs) / fs
+    key = sum(a * np.sin(2 * np.pi * f * t) for a, f in zip((4, 2, 1), targets)) / 7
+    for noise, tones in ((0.0, 1), (0.1, 1), (0.3, 1), (1.0, 0)):
+        x = tones * key + noise * rng.standard_normal(fs)
+        detector = ToneDetector(fs, n_fft, targets, tolerance)
+        for end in range(hop, fs + 1, hop):
+            unlock = detector.process(x[end - hop:end]).unlock
+            if end % n_fft == 0:
+                expected = bool(tones) and top_peaks_unlock(x[end - n_fft:end], fs, targets, tolerance)
+                if unlock != expected:
+                    raise AssertionError(f"ToneDetector decides {unlock} where the top-3 peak test "
+                                         f"decides {expected} (noise {noise}, sample {end})")
+
+# One hop of the application detector (sliding DFT over the target bands), after checking
+# its decisions against the original test
+def application_hop(n_fft=2048, fs=44100):
+    check_tone_decisions(n_fft, fs)
+    detector = ToneDetector(fs, n_fft, [1000, 2000, 3000], 100)
+    t = np.arange(n_fft // 4) / fs
+    block = sum(np.sin(2 * np.pi * f * t) for f in (1000, 2000, 3000))
+    for _ in range(4):
+        detector.process(block)
+    return lambda: detector.process(block)
+
+# Thread counts of the scaling curve: powers of two up to max_threads, plus max_threads
+def thread_counts(max_threads):
+    counts = [1 << k for k in range(max_threads.bit_length())]
+    return counts if counts[-1] == max_threads else counts + [max_threads]
+
+# The same transforms on 1, 2, 4, ... threads (1 thread is the serial plan)
+def parallel_benchmarks(sizes, rng, max_threads):
+    for n in sizes:
+        if n >= FOUR_STEP_MIN_SIZE:
+            x = test_signal(rng, n, 'complex128')
+            reference = np.fft.fft(x)
+            for threads in thread_counts(max_threads):
+                plan = ParallelFFTPlan(n, threads=threads)
+                run = (lambda plan, x: lambda: plan.execute(x))(plan, x)
+                yield f"parallel/four-step/{threads}t/{n}", run, reference, 'complex128'
+        if n <= PARALLEL_MAX_ROW:
+            frames = PARALLEL_BATCH_ELEMENTS // n
+            x = test_signal(rng, (frames, n), 'float64')
+            reference = np.fft.rfft(x, axis=-1)
+            for threads in thread_counts(max_threads):
+                plan = get_parallel_rfft_plan(n, threads=threads)
+                run = (lambda plan, x: lambda: plan.execute_batch(x))(plan, x)
+                yield f"parallel/rfft-batch/{threads}t/{frames}x{n}", run, reference, 'float64'
+
+# Speedup of every parallel benchmark over its 1-thread run
+def scaling_lines(results):
+    lines = []
+    for name, entry in results.items():
+        parts = name.split('/')
+        if parts[0] != 'parallel' or parts[2] == '1t':
+            continue
+        serial = results.get('/'.join(parts[:2] + ['1t'] + parts[3:]))
+        if serial is not None:
+            lines.append(f"{name:<48} {serial['seconds'] / entry['seconds']:>10.2f}x vs 1 thread")
+    return lines
+
+# Streaming FIR filters over FIR_SIGNAL samples in blocks, checked against np.convolve
+def fir_benchmarks(rng):
+    x = rng.standard_normal(FIR_SIGNAL)
+    for block in FIR_BLOCKS:
+        for taps in FIR_TAPS:
+            h = rng.standard_normal(taps)
+            reference = np.convolve(x, h)[:len(x)]
+            for label, method, backend in FIR_METHODS:
+                fir = FIRFilter(h, block, method, backend=backend)
+
+                def run(fir=fir, block=block):
+                    fir.reset()
+                    out = np.empty(len(x))
+                    for start in range(0, len(x), block):
+                        fir.process(x[start:start + block], out[start:start + block])
+                    return out
+                yield f"fir/{label}/block{block}/{taps}", run, reference, 'float64'
+
+# Smallest filter length at which each FFT method beats direct convolution, per block size
+def crossover_lines(results):
+    lines = []
+    for block in FIR_BLOCKS:
+        for label, _, _ in FIR_METHODS[1:]:
+            for taps in FIR_TAPS:
+                direct = results.get(f"fir/direct/block{block}/{taps}")
+                fast = results.get(f"fir/{label}/block{block}/{taps}")
+                if direct and fast and fast['seconds'] < direct['seconds']:
+                    lines.append(f"fir crossover: {label} beats direct from {taps} taps (blocks of {block})")
+                    break
+    return lines
+
+def pipeline_benchmarks():
+    for name, factory in (('pipeline/chapter05-frame', chapter05_frame),
+                          ('pipeline/chapter05-frame-float32', lambda: chapter05_frame(dtype=np.float32)),
+                          ('pipeline/chapter05-frame-4ch', chapter05_channels_frame),
+                          ('pipeline/application-hop', application_hop)):
+        yield name, factory(), None, None
+
+def metadata():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'system': platform.system(),
+        'cpus': os.cpu_count(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+# Benchmarks present in both runs whose best time grew by more than the tolerance
+def regressions(results, baseline, tolerance):
+    slower = []
+    for name, entry in results.items():
+        before = baseline.get(name)
+        if before is not None and entry['seconds'] > before['seconds'] * (1 + tolerance):
+            slower.append((name, before['seconds'], entry['seconds']))
+    return slower
+
+parser = argparse.ArgumentParser(description="Time the FFT engines and the per-frame pipelines")
+parser.add_argument('-o', '--output', default='benchmark.json', help="JSON file for the results")
+parser.add_argument('--baseline', help="earlier results to compare against; regressions exit with status 1")
+parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown vs the baseline (0.25 = 25%%)")
+parser.add_argument('--min-log2', type=int, default=4)
+parser.add_argument('--max-log2', type=int, default=20)
+parser.add_argument('--filter', default='', help="only run benchmarks whose name contains this text")
+parser.add_argument('--repeat', type=int, default=5)
+parser.add_argument('--min-time', type=float, default=0.02, help="seconds per timed run")
+parser.add_argument('--max-threads', type=int, default=os.cpu_count() or 1,
+                    help="largest thread count of the parallel scaling runs (default: one per core)")
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    sizes = [2**k for k in range(args.min_log2, args.max_log2 + 1)]
+    rng = np.random.default_rng(0)
+
+    results = {}
+    suites = (engine_benchmarks(sizes, rng), batch_benchmarks(sizes, rng),
+              parallel_benchmarks(sizes, rng, args.max_threads), fir_benchmarks(rng), pipeline_benchmarks())
+    for suite in suites:
+        for name, run, reference, dtype in suite:
+            if args.filter not in name:
+                continue
+            if reference is not None:
+                check(name, run(), reference, dtype)
+            best, median = measure(run, args.repeat, args.min_time)
+            results[name] = {'seconds': best, 'median': median}
+            print(f"{name:<48} {best * 1e6:>12.1f} us")
+
+    for line in scaling_lines(results) + crossover_lines(results):
+        print(line)
+
+    with open(args.output, 'w') as f:
+        json.dump({'meta': metadata(), 'results': results}, f, indent=1)
+    print(f"{len(results)} benchmarks written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        slower = regressions(results, baseline, args.tolerance)
+        missing = sorted(set(baseline) - set(results))
+        if missing and not args.filter:
+            print(f"{len(missing)} baseline benchmarks were not run: {', '.join(missing[:5])}"
+                  + (' ...' if len(missing) > 5 else ''))
+        for name, before, after in slower:
+            print(f"REGRESSION {name}: {before * 1e6:.1f} us -> {after * 1e6:.1f} us ({after / before:.2f}x)")
+        if slower:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}")
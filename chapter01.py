@@ -2,34 +2,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.widgets import Slider
 
-# Custom Cooley–Tukey FFT function
-def cooley_tukey_fft(x):
-    N = len(x)
-    if N <= 1:
-        return x
-    if N % 2 != 0:
-        raise ValueError("Size of x must be a power of 2")
-
-    # Divide: even and odd indexed elements
-    even_fft = cooley_tukey_fft(x[::2])
-    odd_fft = cooley_tukey_fft(x[1::2])
-
-    # Combine with normalization to match np.fft.fft
-    factor = np.exp(-2j * np.pi * np.arange(N) / N)
-    combined_fft = np.concatenate([
-        even_fft + factor[:N // 2] * odd_fft,
-        even_fft - factor[:N // 2] * odd_fft
-    ])
-
-    return combined_fft
-
-# Function to pad the signal to the nearest power of 2
-def pad_to_power_of_two(signal):
-    N = len(signal)
-    next_power_of_two = 2**int(np.ceil(np.log2(N)))
-    padded_signal = np.zeros(next_power_of_two)
-    padded_signal[:N] = signal
-    return padded_signal
+from cooley_tukey import cooley_tukey_fft, pad_to_power_of_two
 
 # Initial plotting function
 def plot_signals(Hz=1):
@@ -1,8 +1,9 @@
 import numpy as np
 import sounddevice as sd
 import matplotlib.pyplot as plt
-from scipy.fft import fft
-from scipy.signal import windows  # Corrected import
+import time
+
+from cooley_tukey import SpectrumRenderer, find_peaks, get_backend
 
 # Parameters for the sweep
 fs = 44100  # Sampling frequency
@@ -21,53 +22,49 @@ fig, (ax, ax_table) = plt.subplots(2, 1, figsize=(10, 8), gridspec_kw={'height_r
 # FFT settings
 n_fft = 2048
 freqs = np.fft.rfftfreq(n_fft, 1/fs)  # Only positive frequencies up to Nyquist
-window = windows.hann(n_fft)  # Apply a Hann window to the segment
+window = np.hanning(n_fft)  # Apply a Hann window to the segment
+plan = get_backend().rfft_plan(n_fft)  # FFT backend from $COOLEY_TUKEY_BACKEND (custom by default)
+
+update_step = fs // 10  # Update every 0.1 second
+
+# Bars and table are created once and redrawn with blitting
+renderer = SpectrumRenderer(ax, ax_table, freqs, xlim=(0, 5000), autoscale=True,
+                            title='Real-Time FFT Spectrum (Bar Chart)')
 
 # Play the sweep signal in a non-blocking way
 sd.play(sweep_signal, fs)
+start_time = time.perf_counter()
+last_i = -1
 
-# Plot the FFT in real-time as a bar chart
-for i in range(0, len(sweep_signal) - n_fft, fs // 10):  # Update every 0.1 second
-    if not sd.get_stream().active:  # Check if the sound has stopped playing
+# Plot the FFT of the segment at the current playback position, so a slow redraw
+# skips frames instead of making the plot fall behind the audio
+while sd.get_stream().active:  # Stop when the sound has stopped playing
+    i = int((time.perf_counter() - start_time) * fs) // update_step * update_step
+    if i + n_fft > len(sweep_signal):
         break
+    if i == last_i:
+        renderer.idle(0.005)
+        continue
+    last_i = i
 
     segment = sweep_signal[i:i + n_fft] * window  # Apply window function
-    fft_values = np.abs(fft(segment)[:n_fft // 2 + 1])  # Include up to Nyquist frequency
-    
-    # Find the top 4 frequency-amplitude pairs
-    top_indices = np.argsort(fft_values)[-4:][::-1]  # Indices of top 4 amplitudes
-    top_freqs = freqs[top_indices]
-    top_amps = fft_values[top_indices]
+    fft_values = np.abs(plan.execute(segment))  # Real-input FFT: bins up to the Nyquist frequency
     
-    # Calculate the percentage of each amplitude relative to the maximum amplitude
-    max_amp = np.max(fft_values)
-    top_percentages = (top_amps / max_amp) * 100
+    # Top 4 peaks of the full-resolution spectrum, refined to sub-bin frequency and amplitude
+    peak_bins, top_amps = find_peaks(fft_values, 4, min_distance=3)
+    top_freqs = peak_bins * freqs[1]
+
+    # Calculate the percentage of each amplitude relative to the strongest peak
+    max_amp = np.max(top_amps, initial=0)
+    top_percentages = (top_amps / max_amp) * 100 if max_amp > 0 else np.zeros(len(top_amps))
     
     # Create data for the table
     table_data = [[f"{freq:.2f} Hz", f"{amp:.2f}", f"{percent:.2f} %"]
                   for freq, amp, percent in zip(top_freqs, top_amps, top_percentages)]
     
-    # Clear previous plots and tables
-    ax.clear()
-    ax_table.clear()
-    
-    # Plot the FFT spectrum
-    bars = ax.bar(freqs, fft_values, width=freqs[1] - freqs[0], align='center')
-    ax.set_xlim(0, 5000)  # Display up to 5000 Hz
-    ax.set_ylim(0, max(fft_values) * 1.1)
-    ax.set_xlabel('Frequency (Hz)')
-    ax.set_ylabel('Amplitude')
-    ax.set_title('Real-Time FFT Spectrum (Bar Chart)')
-    
-    # Display the table with the top 4 frequency-amplitude pairs
-    ax_table.axis('tight')
-    ax_table.axis('off')
-    table = ax_table.table(cellText=table_data, colLabels=["Frequency", "Amplitude", "% of Max"], loc='center')
-    table.auto_set_font_size(False)
-    table.set_fontsize(10)
-    table.scale(1, 1.5)  # Adjust table size
-    
-    plt.pause(0.1)
+    # Update the bars and table in place
+    renderer.update(fft_values, table_data)
+    renderer.draw()
 
 # Stop the sound and turn off interactive mode
 sd.stop()
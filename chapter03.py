@@ -1,17 +1,13 @@
 import numpy as np
 import sounddevice as sd
 import matplotlib.pyplot as plt
-from scipy.fft import fft
-from scipy.signal import windows  # Corrected import
-import soundfile as sf
 
-# Load the .wav file
-filename = 'input.wav'  # Replace with your .wav file
-sweep_signal, fs = sf.read(filename)
+from cooley_tukey import BandMapper, SpectrumRenderer, WavStream, channel_peaks, stream_spectrogram
 
-# Ensure the audio is mono for simplicity
-if len(sweep_signal.shape) > 1:
-    sweep_signal = sweep_signal[:, 0]  # Take the first channel if stereo
+# Open the .wav file (memory-mapped: samples are only read as they are analysed)
+filename = 'input.wav'  # Replace with your .wav file
+wav = WavStream(filename)
+fs = wav.samplerate
 
 # Set up real-time plotting with subplots
 plt.ion()  # Turn on interactive mode
@@ -20,64 +16,79 @@ fig, (ax, ax_table) = plt.subplots(2, 1, figsize=(10, 8), gridspec_kw={'height_r
 # FFT settings
 n_fft = 2048
 freqs = np.fft.rfftfreq(n_fft, 1/fs)  # Only positive frequencies up to Nyquist
-window = windows.hann(n_fft)  # Apply a Hann window to the segment
+window = np.hanning(n_fft)  # Apply a Hann window to the segment
 
-# Play the audio in a non-blocking way
-sd.play(sweep_signal, fs)
-
-# Plot the FFT in real-time as a bar chart
 update_step = fs // 50  # Increase the update rate for smoother visualization
-for i in range(0, len(sweep_signal) - n_fft, update_step):  # Update more frequently
-    if not sd.get_stream().active:  # Check if the sound has stopped playing
-        break
-
-    segment = sweep_signal[i:i + n_fft] * window  # Apply window function
-    fft_values = np.abs(fft(segment)[:n_fft // 2 + 1])  # Include up to Nyquist frequency
-    
-    # Apply smoothing (moving average) for visualization
-    smoothed_fft_values = np.convolve(fft_values, np.ones(5)/5, mode='same')
-    
-    # Reduce data to 50 points for better visualization
-    indices = np.linspace(0, len(freqs) - 1, 50, dtype=int)
-    reduced_freqs = freqs[indices]
-    reduced_fft_values = smoothed_fft_values[indices]
-    
-    # Find the top 4 frequency-amplitude pairs
-    top_indices = np.argsort(reduced_fft_values)[-4:][::-1]  # Indices of top 4 amplitudes
-    top_freqs = reduced_freqs[top_indices]
-    top_amps = reduced_fft_values[top_indices]
-    
-    # Calculate the percentage of each amplitude relative to the maximum amplitude
-    max_amp = np.max(reduced_fft_values)
-    top_percentages = (top_amps / max_amp) * 100
-    
-    # Create data for the table
-    table_data = [[f"{freq:.2f} Hz", f"{amp:.2f}", f"{percent:.2f} %"]
-                  for freq, amp, percent in zip(top_freqs, top_amps, top_percentages)]
-    
-    # Clear previous plots and tables
-    ax.clear()
-    ax_table.clear()
-    
-    # Plot the FFT spectrum with reduced data
-    bars = ax.bar(reduced_freqs, reduced_fft_values, width=(reduced_freqs[1] - reduced_freqs[0]), align='center')
-    ax.set_xlim(0, 20000)  # Display up to 20,000 Hz
-    ax.set_ylim(0, max(reduced_fft_values) * 1.1)
-    ax.set_xlabel('Frequency (Hz)')
-    ax.set_ylabel('Amplitude')
-    ax.set_title('Real-Time FFT Spectrum (Bar Chart)')
-    
-    # Display the table with the top 4 frequency-amplitude pairs
-    ax_table.axis('tight')
-    ax_table.axis('off')
-    table = ax_table.table(cellText=table_data, colLabels=["Frequency", "Amplitude", "% of Max"], loc='center')
-    table.auto_set_font_size(False)
-    table.set_fontsize(10)
-    table.scale(1, 1.5)  # Adjust table size
-    
-    plt.pause(0.05)  # Reduce pause time for smoother updates
+
+# 50 bars up to 20,000 Hz, each the mean of the bins in its band
+bars = BandMapper(n_fft, fs, 50, 0, 20000)
+
+# Bars and top peaks of one update step at a time. Frames are read, windowed and
+# transformed lazily, one chunk at a time (every channel in the same batched call, with
+# the FFT backend from $COOLEY_TUKEY_BACKEND, custom by default), and each chunk is
+# dropped once it has been played, so memory stays flat for any recording length.
+# The peaks are the top 4 of every channel and of the channels' sum, refined to sub-bin
+# frequency and amplitude; the summed spectrum drives the bars and the table.
+def analysed_rows():
+    for channel_spectra in stream_spectrogram(wav.frame_chunks(n_fft, update_step, channel=None), window):
+        peaks = channel_peaks(channel_spectra, 4, 'sum', min_distance=3)
+        bar_heights = bars.batch(peaks.spectrum)
+        for row in range(len(bar_heights)):
+            yield bar_heights[row], peaks.aggregate_positions[row], peaks.aggregate_amps[row]
+
+# Bars and table are created once and redrawn with blitting
+renderer = SpectrumRenderer(ax, ax_table, **bars.plot_options(), autoscale=True,
+                            title='Real-Time FFT Spectrum (Bar Chart)')
+
+# Play every channel in a non-blocking way, block by block straight from the file
+played = 0
+
+def play_callback(outdata, frames, time, status):
+    global played
+    block = wav.read(played, min(played + frames, wav.frames), channel=None)
+    outdata[:len(block)] = block
+    outdata[len(block):] = 0
+    played += len(block)
+    if len(block) < frames:
+        raise sd.CallbackStop
+
+stream = sd.OutputStream(samplerate=fs, channels=wav.channels, dtype='float32', callback=play_callback)
+stream.start()
+rows = analysed_rows()
+row = -1
+
+# Plot the FFT at the current playback position; rendering runs at its own rate and
+# skips rows it has no time for instead of falling behind the audio
+try:
+    while stream.active:  # Stop when the sound has stopped playing
+        target = played // update_step
+        if target == row:
+            renderer.idle(0.005)
+            continue
+        while row < target:
+            heights, positions, amps = next(rows)
+            row += 1
+
+        # Peaks of the summed spectrum at this row (rows with fewer than 4 peaks are padded)
+        found = amps > 0
+        top_amps = amps[found]
+        top_freqs = positions[found] * freqs[1]
+
+        # Calculate the percentage of each amplitude relative to the strongest peak
+        max_amp = np.max(top_amps, initial=0)
+        top_percentages = (top_amps / max_amp) * 100 if max_amp > 0 else np.zeros(len(top_amps))
+
+        # Create data for the table
+        table_data = [[f"{freq:.2f} Hz", f"{amp:.2f}", f"{percent:.2f} %"]
+                      for freq, amp, percent in zip(top_freqs, top_amps, top_percentages)]
+
+        # Update the bars and table in place
+        renderer.update(heights, table_data)
+        renderer.draw()
+except StopIteration:
+    pass  # The last complete frame has been shown
 
 # Stop the sound and turn off interactive mode
-sd.stop()
+stream.stop()
 plt.ioff()
 plt.show()
@@ -1,123 +1,141 @@
+import argparse
+import sys
+
 import numpy as np
 import sounddevice as sd
-import matplotlib.pyplot as plt
-from scipy.signal import windows
-
-# Custom Cooley–Tukey FFT function
-def cooley_tukey_fft(x):
-    N = len(x)
-    if N <= 1:
-        return x
-    if N % 2 != 0:
-        raise ValueError("Size of x must be a power of 2")
-
-    # Divide: even and odd indexed elements
-    even_fft = cooley_tukey_fft(x[::2])
-    odd_fft = cooley_tukey_fft(x[1::2])
-    
-    # Combine
-    factor = np.exp(-2j * np.pi * np.arange(N) / N)
-    return np.concatenate([even_fft + factor[:N // 2] * odd_fft,
-                           even_fft - factor[:N // 2] * odd_fft])
-
-# Function to pad the signal to the nearest power of 2
-def pad_to_power_of_two(signal):
-    N = len(signal)
-    next_power_of_two = 2**int(np.ceil(np.log2(N)))
-    padded_signal = np.zeros(next_power_of_two)
-    padded_signal[:N] = signal
-    return padded_signal
+
+from cooley_tukey import BandMapper, RingBuffer, STFTEngine, find_peaks, ring_callback
+from cooley_tukey.backends import add_backend_arguments, backend_from_args
+from cooley_tukey.bands import add_band_arguments
+from cooley_tukey.channels import add_channel_arguments, channel_peaks
+from cooley_tukey.fir import add_filter_arguments, filter_from_args
+from cooley_tukey.instrument import add_profile_arguments, finish_profile, profiler_from_args
+from cooley_tukey.output import add_output_arguments, writer_from_args
+
+# --headless skips matplotlib entirely and writes one record per frame (JSON lines or binary)
+parser = add_output_arguments(argparse.ArgumentParser(description="Custom Cooley–Tukey FFT of the microphone input"))
+add_band_arguments(parser)
+add_profile_arguments(parser)
+add_channel_arguments(parser)
+add_backend_arguments(parser)
+add_filter_arguments(parser)
+args = parser.parse_args()
+channels = args.channels  # --channels N: capture N microphones and transform them together
+writer = writer_from_args(args, channels=channels if channels > 1 else 0)
+profiler = profiler_from_args(args)  # --profile: per-stage timing histograms (a no-op otherwise)
 
 # Audio settings
 fs = 44100  # Sampling rate
 n_fft = 2048  # Number of FFT points
-window = windows.hann(n_fft)  # Apply a Hann window to the segment
-
-# Set up real-time plotting with subplots
-plt.ion()  # Turn on interactive mode
-fig, (ax, ax_table) = plt.subplots(2, 1, figsize=(12, 8), gridspec_kw={'height_ratios': [3, 1]})
+dtype = np.dtype(args.precision)  # --precision float32 keeps every stage in float32/complex64
+window = np.hanning(n_fft).astype(dtype)  # Apply a Hann window to the segment
+# Twiddles, permutation and buffers are built once and reused every frame (--backend swaps the engine)
+plan = backend_from_args(args).rfft_plan(n_fft, dtype)
 
 # FFT frequency bins up to Nyquist frequency
 freqs = np.fft.rfftfreq(n_fft, 1/fs)
 
-# Shared data structure for live plotting
-audio_data = np.zeros(n_fft)
+# Lock-free ring buffer filled by the audio callback, framed with 75% overlap
+hop = n_fft // 4  # 512 samples (about 12 ms) between frames
+ring = RingBuffer(8 * n_fft, channels=channels)
+stft = STFTEngine(ring, n_fft, hop, window, dtype=dtype)
 
-# Audio callback function for real-time input
-def audio_callback(indata, frames, time, status):
-    global audio_data
-    if status:
-        print(status)
-    audio_data = indata[:, 0]  # Take the first channel
+# --bandpass/--bandstop/--highpass: FIR pre-filter run in the audio callback, one hop at a time
+fir = filter_from_args(args, fs, block=hop, backend=args.backend)
+if fir is not None and channels > 1:
+    parser.error("the pre-filter options need a single channel")
 
-# Start the audio stream for real-time input
-stream = sd.InputStream(callback=audio_callback, channels=1, samplerate=fs, blocksize=n_fft)
+# Start the audio stream for real-time input (the callback appends the first channel, or
+# every channel with --channels, to the ring)
+callback = ring_callback(ring, channel=0 if channels == 1 else None, profiler=profiler, fir=fir)
+stream = sd.InputStream(callback=callback, channels=channels, samplerate=fs, blocksize=hop)
 stream.start()
 
+# Focus on the 0 Hz to 6000 Hz range: 61 bars by default, each the mean of the bins in its
+# band (one precomputed matrix-vector product per drawn frame)
+bars = BandMapper(n_fft, fs, args.bands, 0, 6000, layout=args.band_layout, dtype=dtype)
+# Bin range searched for peaks
+peak_lo, peak_hi = np.flatnonzero(freqs <= 6000)[[0, -1]]
+
+# Bars and table are created once and redrawn with blitting; the plot is only set up
+# (and matplotlib only imported) when running with a display
+renderer = None
+if not args.headless:
+    from cooley_tukey.render import create_spectrum_plot
+    renderer = create_spectrum_plot(**bars.plot_options(), ylim=(0, 18),
+                                    title=f'Real-Time FFT Spectrum (0 Hz to 6000 Hz) with {bars.bands} Bars')
+
 try:
     while True:
-        # Apply window function and pad the segment to the nearest power of 2
-        segment = audio_data * window
-        padded_segment = pad_to_power_of_two(segment)
-        
-        # Apply custom Cooley–Tukey FFT
-        fft_values = np.abs(cooley_tukey_fft(padded_segment)[:len(padded_segment) // 2 + 1])
-        
-        # Apply smoothing (moving average) for visualization
-        smoothed_fft_values = np.convolve(fft_values, np.ones(5)/5, mode='same')
-        
-        # Focus on the 0 Hz to 6000 Hz range
-        valid_indices = (freqs >= 0) & (freqs <= 6000)
-        freqs_focus = freqs[valid_indices]
-        fft_values_focus = smoothed_fft_values[valid_indices]
-        
-        # Reduce data to 61 points for better visualization
-        indices = np.linspace(0, len(freqs_focus) - 1, 61, dtype=int)
-        reduced_freqs = freqs_focus[indices]
-        reduced_fft_values = fft_values_focus[indices]
-        
-        # Find the top 4 frequency-amplitude pairs
-        top_indices = np.argsort(reduced_fft_values)[-4:][::-1]
-        top_freqs = reduced_freqs[top_indices]
-        top_amps = reduced_fft_values[top_indices]
-        
-        # Calculate the percentage of each amplitude relative to the maximum amplitude
-        max_amp = np.max(reduced_fft_values)
-        if max_amp > 0:
-            top_percentages = (top_amps / max_amp) * 100
-        else:
-            top_percentages = [0] * len(top_amps)
-        
-        # Create data for the table
-        table_data = [[f"{freq:.2f} Hz", f"{amp:.2f}", f"{percent:.2f} %"]
-                      for freq, amp, percent in zip(top_freqs, top_amps, top_percentages)]
-        
-        # Clear previous plots and tables
-        ax.clear()
-        ax_table.clear()
-        
-        # Plot the FFT spectrum with reduced data
-        ax.bar(reduced_freqs, reduced_fft_values, width=(reduced_freqs[1] - reduced_freqs[0]), align='center')
-        ax.set_xlim(0, 6000)  # Display only 0 Hz to 6000 Hz range
-        ax.set_ylim(0, 18)
-
-        ax.set_xlabel('Frequency (Hz)')
-        ax.set_ylabel('Amplitude')
-        ax.set_title('Real-Time FFT Spectrum (0 Hz to 6000 Hz) with 61 Bars')
-        
-        # Display the table with the top 4 frequency-amplitude pairs
-        ax_table.axis('tight')
-        ax_table.axis('off')
-        table = ax_table.table(cellText=table_data, colLabels=["Frequency", "Amplitude", "% of Max"], loc='center')
-        table.auto_set_font_size(False)
-        table.set_fontsize(10)
-        table.scale(1, 1.5)  # Adjust table size
-        
-        plt.pause(0.04)  # Reduce pause time for smoother updates
+        # Analyse every windowed frame in order; only the newest result is drawn
+        segment = None
+        profiler.start()
+        for segment in stft.frames():
+            profiler.lap('frame')  # Ring read and windowing
+
+            per_channel = None
+            if channels > 1:
+                # Every channel in one batched real-input FFT with the shared plan: (channels x N/2+1)
+                spectra = np.abs(plan.execute_batch(segment))
+                profiler.lap('fft')
+
+                # Top 4 peaks of every channel and of the --aggregate spectrum (bars and table)
+                result = channel_peaks(spectra, 4, args.aggregate, min_distance=3, lo=peak_lo, hi=peak_hi + 1)
+                fft_values = result.spectrum
+                found = result.aggregate_amps > 0
+                peak_bins, top_amps = result.aggregate_positions[found], result.aggregate_amps[found]
+                top_freqs = peak_bins * freqs[1]
+                per_channel = (result.positions * freqs[1], result.amps)
+            else:
+                # Pad the segment to the nearest power of 2
+                padded_segment = plan.pad(segment)
+
+                # Apply custom Cooley–Tukey FFT
+                fft_values = np.abs(plan.execute(padded_segment))  # Real-input FFT: only the N/2+1 non-redundant bins
+                profiler.lap('fft')
+
+                # Top 4 peaks of the full-resolution spectrum, refined to sub-bin frequency and amplitude
+                peak_bins, top_amps = find_peaks(fft_values, 4, min_distance=3, lo=peak_lo, hi=peak_hi + 1)
+                top_freqs = peak_bins * freqs[1]
+
+            # Calculate the percentage of each amplitude relative to the strongest peak
+            max_amp = np.max(top_amps, initial=0)
+            if max_amp > 0:
+                top_percentages = (top_amps / max_amp) * 100
+            else:
+                top_percentages = [0] * len(top_amps)
+            profiler.lap('peaks')
+
+            # Emit the frame's result and/or hand the table rows to the plot
+            if writer is not None:
+                frame = stft.frames_out - 1
+                writer.write(frame, frame * hop / fs, top_freqs, top_amps, channels=per_channel)
+                profiler.lap('output')
+            if renderer is not None:
+                table_data = [[f"{freq:.2f} Hz", f"{amp:.2f}", f"{percent:.2f} %"]
+                              for freq, amp, percent in zip(top_freqs, top_amps, top_percentages)]
+                renderer.update(bars(fft_values), table_data)
+                profiler.lap('bars')
+        profiler.report_if_due()
+
+        if renderer is None:
+            if segment is None:
+                sd.sleep(5)
+            continue
+        if segment is None:
+            renderer.idle(0.005)
+        profiler.start()
+        if renderer.draw_if_due():
+            profiler.lap('render')
 
 except KeyboardInterrupt:
-    print("Stopped by user")
+    print("Stopped by user", file=sys.stderr)
 finally:
     stream.stop()
-    plt.ioff()
-    plt.show()
+    print(stft.stats(), file=sys.stderr)
+    finish_profile(profiler, args)
+    if writer is not None:
+        writer.close()
+    if renderer is not None:
+        from cooley_tukey.render import show_final_plot
+        show_final_plot()
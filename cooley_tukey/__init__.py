@@ -0,0 +1,121 @@
+from .fft import (
+    cooley_tukey_fft,
+    cooley_tukey_fft_recursive,
+    fft,
+    ifft,
+    pad_to_power_of_two,
+)
+from .plan import (
+    FFTPlan,
+    PlanCacheInfo,
+    clear_plan_cache,
+    plan_cache_info,
+    set_plan_cache_limit,
+)
+from .mixed import (
+    BluesteinPlan,
+    MixedRadixPlan,
+    factorize,
+)
+from .planner import (
+    choose_strategy,
+    get_plan,
+    make_plan,
+)
+from .real import (
+    RealFFTPlan,
+    get_rfft_plan,
+    irfft,
+    rfft,
+)
+from .batch import (
+    batch_fft,
+    batch_rfft,
+    frame_count,
+    frame_signal,
+    spectrogram,
+    stream_spectrogram,
+)
+from .stream import (
+    RingBuffer,
+    STFTEngine,
+    StreamStats,
+    ring_callback,
+)
+from .wavstream import (
+    WavStream,
+    read_wav_header,
+)
+from .analysis import (
+    analyze_file,
+    spectrum_peaks,
+)
+from .render import (
+    SpectrumRenderer,
+    create_spectrum_plot,
+)
+from .output import (
+    BinaryWriter,
+    JsonLinesWriter,
+    open_writer,
+    read_binary_records,
+)
+from .tones import (
+    SlidingDFT,
+    ToneDecision,
+    ToneDetector,
+)
+from .serialio import (
+    FrameDecoder,
+    FrameStats,
+    SerialBlockReader,
+    SerialFrameReader,
+    SerialStats,
+    adc_to_voltage,
+    encode_frame,
+)
+from .peaks import (
+    find_peaks,
+    find_peaks_batch,
+    interpolate_peaks,
+)
+from .bands import (
+    BandMapper,
+    band_edges,
+    get_band_mapper,
+)
+from .instrument import (
+    Histogram,
+    NullProfiler,
+    StageProfiler,
+)
+from .backends import (
+    Backend,
+    LibraryPlan,
+    available_backends,
+    get_backend,
+    register_backend,
+)
+from .wisdom import (
+    Autotuner,
+    TunedBackend,
+)
+from .channels import (
+    ChannelPeaks,
+    aggregate_channels,
+    channel_peaks,
+)
+from .parallel import (
+    ParallelFFTPlan,
+    get_parallel_plan,
+    get_parallel_rfft_plan,
+    set_default_threads,
+)
+from .outofcore import (
+    out_of_core_fft,
+)
+from .fir import (
+    FIRFilter,
+    design_fir,
+    filter_response,
+)
@@ -0,0 +1,86 @@
+import os
+import time
+
+import numpy as np
+
+from .batch import stream_spectrogram
+from .channels import channel_peaks
+from .peaks import find_peaks_batch
+from .wavstream import WavStream
+
+# Defaults of the chapter03 pipeline: 2048-point Hann frames every fs/50 samples, top 4 peaks
+DEFAULT_N_FFT = 2048
+DEFAULT_UPDATES_PER_SECOND = 50
+DEFAULT_PEAKS = 4
+# Peaks closer than this many bins to a stronger one are dropped, as in the live peak tables
+DEFAULT_MIN_DISTANCE = 3
+
+# Top peaks of every row of a (frames x bins) magnitude spectrogram, as chapter03 picks them
+# one frame at a time: local maxima of the full-resolution spectrum, refined to sub-bin
+# frequency and amplitude. Rows with fewer peaks are padded with nan frequencies and zero
+# amplitudes. Returns (frequencies, amplitudes, % of max), each (frames x peaks).
+def spectrum_peaks(spectrum, freqs, peaks=DEFAULT_PEAKS):
+    positions, amps = find_peaks_batch(spectrum, peaks, DEFAULT_MIN_DISTANCE)
+    return positions * freqs[1], amps, peak_percent(amps)
+
+# Amplitudes as % of the strongest peak of their row (peaks are sorted strongest first)
+def peak_percent(amps):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return amps / amps[..., :1] * 100
+
+# spectrum_peaks of a (frames x channels x bins) spectrogram: per-channel columns, each
+# (frames x channels x peaks), followed by the columns of the cross-channel aggregate
+def multichannel_peaks(spectrum, freqs, peaks=DEFAULT_PEAKS, aggregate='sum'):
+    result = channel_peaks(spectrum, peaks, aggregate, DEFAULT_MIN_DISTANCE)
+    return (result.positions * freqs[1], result.amps, peak_percent(result.amps),
+            result.aggregate_positions * freqs[1], result.aggregate_amps, peak_percent(result.aggregate_amps))
+
+# Run the windowed FFT / top-peak pipeline over a whole recording, chunk by chunk,
+# and return the per-frame results as a dict of columns. channel=None analyses every
+# channel in the same batched transforms: peak_* columns become (frames x channels x peaks)
+# and aggregate_* columns hold the peaks of the channels' `aggregate` ('sum' or 'max').
+def analyze_file(path, n_fft=DEFAULT_N_FFT, hop=None, channel=0, window=None, peaks=DEFAULT_PEAKS, backend=None,
+                 precision='float64', aggregate='sum'):
+    wav = WavStream(path)
+    fs = wav.samplerate
+    hop = hop or fs // DEFAULT_UPDATES_PER_SECOND
+    dtype = np.dtype(precision)
+    window = np.hanning(n_fft) if window is None else window
+    freqs = np.fft.rfftfreq(n_fft, 1 / fs)
+
+    chunks = stream_spectrogram(wav.frame_chunks(n_fft, hop, channel, dtype), window, backend, dtype)
+    if channel is None:
+        names = ['peak_freq', 'peak_amp', 'peak_percent', 'aggregate_freq', 'aggregate_amp', 'aggregate_percent']
+        blocks = [multichannel_peaks(block, freqs, peaks, aggregate) for block in chunks]
+    else:
+        names = ['peak_freq', 'peak_amp', 'peak_percent']
+        blocks = [spectrum_peaks(block, freqs, peaks) for block in chunks]
+    if blocks:
+        columns = {name: np.concatenate(column) for name, column in zip(names, zip(*blocks))}
+    else:
+        columns = {name: np.empty((0, wav.channels, peaks) if channel is None and name.startswith('peak')
+                                  else (0, peaks)) for name in names}
+
+    frames = len(columns['peak_freq'])
+    return {
+        'frame': np.arange(frames),
+        'time': np.arange(frames) * hop / fs,
+        **columns,
+        'samplerate': np.array(fs),
+        'n_fft': np.array(n_fft),
+        'hop': np.array(hop),
+        'duration': np.array(wav.duration),
+    }
+
+# Write analysis columns to a .npz file (one named array per column)
+def save_columns(path, columns):
+    np.savez(path, **columns)
+
+# Process-pool worker: analyze one file, write <out_dir>/<name>.npz and return
+# (input path, output path, frames, audio seconds, wall seconds) for progress reporting
+def analyze_to_file(path, out_dir, **options):
+    start = time.perf_counter()
+    columns = analyze_file(path, **options)
+    out_path = os.path.join(out_dir, os.path.splitext(os.path.basename(path))[0] + '.npz')
+    save_columns(out_path, columns)
+    return path, out_path, len(columns['frame']), float(columns['duration']), time.perf_counter() - start
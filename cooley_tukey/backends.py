@@ -0,0 +1,197 @@
+import os
+import time
+from functools import partial
+
+import numpy as np
+
+from .parallel import THREADS_ENV_VAR, get_parallel_plan, get_parallel_rfft_plan, set_default_threads
+from .plan import pad_into
+from .planner import get_plan
+from .real import get_rfft_plan
+
+# Backend used when none is named; the environment variable lets a deployment switch
+# every script at once, e.g. COOLEY_TUKEY_BACKEND=fastest
+BACKEND_ENV_VAR = 'COOLEY_TUKEY_BACKEND'
+DEFAULT_BACKEND = 'custom'
+
+# Real sample types of the --precision option. float32 keeps the live pipeline in
+# float32/complex64 from capture to peak table (spectra within 1e-6 of the float64 peak)
+PRECISIONS = ('float64', 'float32')
+
+# Transform size and calls per backend used by the 'fastest' selection
+FASTEST_PROBE_SIZE = 2048
+FASTEST_PROBE_CALLS = 20
+
+# Fixed-size plan over a library FFT (numpy or scipy), with the same interface as
+# RealFFTPlan / FFTPlan: pad(signal), execute(x) and execute_batch(frames), plus
+# inverse(X) and inverse_batch(spectra) when the matching inverse transform is given
+class LibraryPlan:
+    def __init__(self, n, transform, dtype=np.float64, inverse=None):
+        self.n = n
+        self.transform = transform
+        self.inverse_transform = inverse
+        self.padded = np.zeros(n, dtype=dtype)
+
+    def pad(self, signal):
+        return pad_into(self.padded, signal)
+
+    def execute(self, x):
+        return self.transform(x, self.n)
+
+    def execute_batch(self, x):
+        return self.transform(x, self.n, axis=-1)
+
+    def inverse(self, X):
+        return self.inverse_transform(X, self.n)
+
+    def inverse_batch(self, X):
+        return self.inverse_transform(X, self.n, axis=-1)
+
+    def __repr__(self):
+        name = getattr(self.transform, '__name__', None)
+        transform = f"{self.transform.__module__}.{name}" if name else repr(self.transform)
+        return f"LibraryPlan(n={self.n}, transform={transform})"
+
+# One FFT implementation behind a common interface. rfft_plan(n) / fft_plan(n) return
+# plans with pad / execute / execute_batch; results may live in a buffer the plan reuses,
+# so copy them if they must outlive the next call. batch is the expected number of rows
+# per execute_batch call (only the tuned backend uses it).
+class Backend:
+    def __init__(self, name, rfft_plan, fft_plan):
+        self.name = name
+        self.make_rfft_plan = rfft_plan
+        self.make_fft_plan = fft_plan
+
+    def rfft_plan(self, n, dtype=np.float64, batch=1):
+        return self.make_rfft_plan(n, dtype)
+
+    def fft_plan(self, n, dtype=np.complex128, batch=1):
+        return self.make_fft_plan(n, dtype)
+
+    def rfft(self, x):
+        x = np.asarray(x)
+        return self.rfft_plan(x.shape[-1], x.dtype).execute(x)
+
+    def fft(self, x):
+        x = np.asarray(x)
+        return self.fft_plan(x.shape[-1]).execute(x)
+
+    def __repr__(self):
+        return f"Backend({self.name!r})"
+
+def custom_backend():
+    # Odd sizes cannot use the packed real transform; they fall back to a library plan
+    def rfft_plan(n, dtype):
+        if n % 2:
+            return LibraryPlan(n, np.fft.rfft, dtype=dtype, inverse=np.fft.irfft)
+        return get_rfft_plan(n, dtype)
+    return Backend('custom', rfft_plan, lambda n, dtype: get_plan(n, dtype))
+
+def numpy_backend():
+    return Backend('numpy',
+                   lambda n, dtype: LibraryPlan(n, np.fft.rfft, dtype=dtype, inverse=np.fft.irfft),
+                   lambda n, dtype: LibraryPlan(n, np.fft.fft, dtype=dtype))
+
+def scipy_backend():
+    import scipy.fft
+    return Backend('scipy',
+                   lambda n, dtype: LibraryPlan(n, scipy.fft.rfft, dtype=dtype, inverse=scipy.fft.irfft),
+                   lambda n, dtype: LibraryPlan(n, scipy.fft.fft, dtype=dtype))
+
+# The custom plans spread over a thread pool (cooley_tukey.parallel): batches are split into
+# blocks of rows and long single transforms use the four-step decomposition
+def parallel_backend():
+    def rfft_plan(n, dtype):
+        if n % 2:
+            return LibraryPlan(n, np.fft.rfft, dtype=dtype, inverse=np.fft.irfft)
+        return get_parallel_rfft_plan(n, dtype)
+    return Backend('parallel', rfft_plan, lambda n, dtype: get_parallel_plan(n, dtype))
+
+# scipy.fft with its own thread pool across all cores; only pays off for large or batched transforms
+def scipy_workers_backend():
+    import scipy.fft
+    return Backend('scipy-workers',
+                   lambda n, dtype: LibraryPlan(n, partial(scipy.fft.rfft, workers=-1), dtype=dtype,
+                                                inverse=partial(scipy.fft.irfft, workers=-1)),
+                   lambda n, dtype: LibraryPlan(n, partial(scipy.fft.fft, workers=-1), dtype=dtype))
+
+# Registry: name -> factory; a factory that raises ImportError marks the backend unavailable
+BACKEND_FACTORIES = {
+    'custom': custom_backend,
+    'parallel': parallel_backend,
+    'numpy': numpy_backend,
+    'scipy': scipy_backend,
+    'scipy-workers': scipy_workers_backend,
+}
+
+# Names get_backend resolves besides the registered backends
+SELECTORS = ('fastest', 'tuned')
+loaded_backends = {}
+
+def register_backend(name, factory):
+    BACKEND_FACTORIES[name] = factory
+    loaded_backends.pop(name, None)
+
+def available_backends():
+    names = []
+    for name in BACKEND_FACTORIES:
+        try:
+            load_backend(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+def load_backend(name):
+    if name not in loaded_backends:
+        if name not in BACKEND_FACTORIES:
+            raise ValueError(f"Unknown FFT backend {name!r}; expected one of "
+                             f"{sorted(BACKEND_FACTORIES) + list(SELECTORS)}")
+        loaded_backends[name] = BACKEND_FACTORIES[name]()
+    return loaded_backends[name]
+
+# Backend by name; None means $COOLEY_TUKEY_BACKEND or 'custom'. 'fastest' times the
+# real-input transform of every available backend once per process and keeps the quickest;
+# 'tuned' picks per (N, dtype, batch) from the on-disk wisdom of cooley_tukey.wisdom
+def get_backend(name=None):
+    if isinstance(name, Backend):
+        return name
+    name = name or os.environ.get(BACKEND_ENV_VAR) or DEFAULT_BACKEND
+    if name == 'fastest':
+        if 'fastest' not in loaded_backends:
+            loaded_backends['fastest'] = fastest_backend()
+        return loaded_backends['fastest']
+    if name == 'tuned':
+        if 'tuned' not in loaded_backends:
+            from .wisdom import TunedBackend
+            loaded_backends['tuned'] = TunedBackend()
+        return loaded_backends['tuned']
+    return load_backend(name)
+
+def fastest_backend(n=FASTEST_PROBE_SIZE, calls=FASTEST_PROBE_CALLS):
+    x = np.random.default_rng(0).standard_normal(n)
+    timings = {}
+    for name in available_backends():
+        plan = load_backend(name).rfft_plan(n)
+        plan.execute(x)
+        start = time.perf_counter()
+        for _ in range(calls):
+            plan.execute(x)
+        timings[name] = time.perf_counter() - start
+    return load_backend(min(timings, key=timings.get))
+
+# --backend / --precision / --threads options shared by the scripts
+def add_backend_arguments(parser):
+    parser.add_argument('--backend', default=None, choices=sorted(BACKEND_FACTORIES) + list(SELECTORS),
+                        help=f"FFT backend (default: ${BACKEND_ENV_VAR} or {DEFAULT_BACKEND})")
+    parser.add_argument('--precision', default='float64', choices=PRECISIONS,
+                        help="sample type of windows, transforms and bars (float32 halves the memory traffic)")
+    parser.add_argument('--threads', type=int, default=None,
+                        help=f"threads of the parallel backend (default: ${THREADS_ENV_VAR} or one per core)")
+    return parser
+
+# Backend selected by add_backend_arguments' options, with --threads applied
+def backend_from_args(args):
+    if args.threads:
+        set_default_threads(args.threads)
+    return get_backend(args.backend)
@@ -0,0 +1,100 @@
+from functools import lru_cache
+
+import numpy as np
+
+# Band layouts for BandMapper; 'octave' is 1/3-octave (IEC 61260 base-2 centres around 1 kHz)
+BAND_LAYOUTS = ('linear', 'log', 'mel', 'octave')
+
+# Mapper instances kept by get_band_mapper
+BAND_MAPPER_CACHE_SIZE = 16
+
+def hz_to_mel(f):
+    return 2595.0 * np.log10(1.0 + np.asarray(f, dtype=np.float64) / 700.0)
+
+def mel_to_hz(m):
+    return 700.0 * (10.0 ** (np.asarray(m, dtype=np.float64) / 2595.0) - 1.0)
+
+# Band edges (bands + 1 values, ascending) of a layout between fmin and fmax.
+# 'log' starts at fmin or 20 Hz, whichever is higher (a log scale cannot start at 0);
+# 'octave' has a fixed spacing, so `bands` is ignored and every 1/3-octave band whose
+# centre lies in [fmin, fmax] is kept.
+def band_edges(layout, fmin, fmax, bands):
+    if layout == 'linear':
+        return np.linspace(fmin, fmax, bands + 1)
+    if layout == 'log':
+        return np.geomspace(max(fmin, 20.0), fmax, bands + 1)
+    if layout == 'mel':
+        return mel_to_hz(np.linspace(hz_to_mel(fmin), hz_to_mel(fmax), bands + 1))
+    if layout == 'octave':
+        low = int(np.ceil(3 * np.log2(max(fmin, 20.0) / 1000.0)))
+        high = int(np.floor(3 * np.log2(fmax / 1000.0)))
+        centres = 1000.0 * 2.0 ** (np.arange(low, high + 1) / 3)
+        return np.append(centres * 2.0 ** (-1 / 6), centres[-1] * 2.0 ** (1 / 6))
+    raise ValueError(f"Unknown band layout {layout!r}, expected one of {BAND_LAYOUTS}")
+
+# Aggregates a magnitude spectrum (n_fft//2+1 bins) into bars with one matrix-vector product.
+# Bin k covers [(k - 1/2) df, (k + 1/2) df); each bar is the mean of the bins it overlaps,
+# weighted by the overlap, so every bin contributes instead of one sampled point per bar,
+# and bands narrower than a bin (low log/octave bands) still get the value of the bin they fall in.
+# With normalize=False the weights are the plain overlap fractions (a sum instead of a mean).
+# The matrix only spans the bins some band touches (lo:hi), so the product skips the rest.
+# It is stored in `dtype`, so float32 spectra are mapped without being promoted.
+class BandMapper:
+    def __init__(self, n_fft, fs, bands=61, fmin=0.0, fmax=None, layout='linear', normalize=True,
+                 dtype=np.float64):
+        self.n_fft = n_fft
+        self.fs = fs
+        self.layout = layout
+        fmax = fs / 2 if fmax is None else min(fmax, fs / 2)
+        self.edges = band_edges(layout, fmin, fmax, bands)
+        self.widths = np.diff(self.edges)
+        if layout == 'linear':
+            self.centers = self.edges[:-1] + self.widths / 2
+        elif layout == 'mel':
+            self.centers = mel_to_hz(hz_to_mel(self.edges[:-1]) + np.diff(hz_to_mel(self.edges)) / 2)
+        else:
+            self.centers = np.sqrt(self.edges[:-1] * self.edges[1:])
+        self.bands = len(self.centers)
+
+        df = fs / n_fft
+        self.lo = max(0, int(np.floor(self.edges[0] / df + 0.5)))
+        self.hi = min(n_fft // 2 + 1, int(np.ceil(self.edges[-1] / df + 0.5)))
+        bin_lo = (np.arange(self.lo, self.hi) - 0.5) * df
+        overlap = (np.minimum(self.edges[1:, None], bin_lo + df)
+                   - np.maximum(self.edges[:-1, None], bin_lo))
+        matrix = np.maximum(overlap, 0.0) / df
+        if normalize:
+            totals = matrix.sum(axis=1, keepdims=True)
+            np.divide(matrix, totals, out=matrix, where=totals > 0)
+        self.matrix = np.ascontiguousarray(matrix, dtype=dtype)
+
+    # Bar values of one spectrum; `out` (bands,) may be given to avoid the allocation
+    def __call__(self, spectrum, out=None):
+        return np.dot(self.matrix, spectrum[self.lo:self.hi], out=out)
+
+    # Bar values of every row of a (frames x bins) spectrogram: (frames x bands)
+    def batch(self, spectrogram):
+        return np.asarray(spectrogram)[..., self.lo:self.hi] @ self.matrix.T
+
+    # Bar geometry for SpectrumRenderer / create_spectrum_plot: left edges as x, band widths,
+    # and a log frequency axis for the log and octave layouts
+    def plot_options(self):
+        return {
+            'x': self.edges[:-1],
+            'width': self.widths,
+            'align': 'edge',
+            'xscale': 'log' if self.layout in ('log', 'octave') else 'linear',
+            'xlim': (self.edges[0], self.edges[-1]),
+        }
+
+# Shared BandMapper per (n_fft, fs, layout) so scripts and batch jobs build each matrix once
+@lru_cache(maxsize=BAND_MAPPER_CACHE_SIZE)
+def get_band_mapper(n_fft, fs, bands=61, fmin=0.0, fmax=None, layout='linear', normalize=True,
+                    dtype=np.float64):
+    return BandMapper(n_fft, fs, bands, fmin, fmax, layout, normalize, dtype)
+
+# --bands / --band-layout options shared by the live scripts
+def add_band_arguments(parser, bands=61):
+    parser.add_argument('--bands', type=int, default=bands, help="number of bars (ignored by the octave layout)")
+    parser.add_argument('--band-layout', choices=BAND_LAYOUTS, default='linear', help="spacing of the bars")
+    return parser
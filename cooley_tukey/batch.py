@@ -0,0 +1,67 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .backends import get_backend
+from .planner import get_plan
+
+# Frames per block when transforming long signals, so temporaries stay cache-sized
+DEFAULT_BLOCK_FRAMES = 256
+
+# Strided (frames x n_fft) view of the signal with the given hop; no data is copied
+def frame_signal(signal, n_fft, hop):
+    signal = np.asarray(signal)
+    if len(signal) < n_fft:
+        return np.empty((0, n_fft), dtype=signal.dtype)
+    return sliding_window_view(signal, n_fft)[::hop]
+
+# Number of frames frame_signal yields for a signal of the given length
+def frame_count(length, n_fft, hop):
+    if length < n_fft:
+        return 0
+    return (length - n_fft) // hop + 1
+
+# Batched complex FFT of every row of a (frames x n) array
+def batch_fft(frames):
+    frames = np.asarray(frames)
+    return get_plan(frames.shape[-1], np.complex128).execute_batch(frames)
+
+# Batched real-input FFT of every row: (frames x n) -> (frames x n//2+1); float32 rows
+# stay in complex64
+def batch_rfft(frames, backend=None):
+    frames = np.asarray(frames)
+    dtype = np.float32 if frames.dtype == np.float32 else np.float64
+    return get_backend(backend).rfft_plan(frames.shape[-1], dtype, batch=len(frames)).execute_batch(frames)
+
+# Magnitude spectrogram of a whole signal: (frames x n_fft//2+1), one row per hop.
+# Frames are windowed with a single broadcast and transformed block by block, in float64
+# or (dtype=np.float32) entirely in float32/complex64.
+def spectrogram(signal, n_fft, hop, window=None, block_frames=DEFAULT_BLOCK_FRAMES, backend=None,
+                dtype=np.float64):
+    frames = frame_signal(signal, n_fft, hop)
+    plan = get_backend(backend).rfft_plan(n_fft, dtype, batch=min(block_frames, len(frames)))
+    result = np.empty((len(frames), n_fft // 2 + 1), dtype=dtype)
+    if window is not None:
+        window = np.asarray(window, dtype=dtype)
+
+    for start in range(0, len(frames), block_frames):
+        block = frames[start:start + block_frames]
+        if window is not None:
+            block = block * window
+        np.abs(plan.execute_batch(np.ascontiguousarray(block, dtype=dtype)),
+               out=result[start:start + len(block)])
+    return result
+
+# Magnitude spectrogram of a stream of (frames x n_fft) chunks, e.g. WavStream.frame_chunks;
+# yields one block of rows per chunk so memory stays bounded for any recording length.
+# Multi-channel (frames x channels x n_fft) chunks go through the same single batched call.
+def stream_spectrogram(chunks, window=None, backend=None, dtype=np.float64):
+    backend = get_backend(backend)
+    if window is not None:
+        window = np.asarray(window, dtype=dtype)
+    for chunk in chunks:
+        if window is not None:
+            chunk = chunk * window
+        n = chunk.shape[-1]
+        rows = np.ascontiguousarray(chunk, dtype=dtype).reshape(-1, n)
+        plan = backend.rfft_plan(n, dtype, batch=len(rows))
+        yield np.abs(plan.execute_batch(rows)).reshape(chunk.shape[:-1] + (n // 2 + 1,))
@@ -0,0 +1,53 @@
+from collections import namedtuple
+
+import numpy as np
+
+from .peaks import find_peaks, find_peaks_batch
+
+# Cross-channel reductions of magnitude spectra: 'sum' favours tones heard by every
+# microphone, 'max' keeps a tone that only the nearest one picks up
+CHANNEL_AGGREGATES = ('sum', 'max')
+
+# Below this many spectra (channels plus the aggregate) a find_peaks call per row is cheaper
+# than the fixed cost of one find_peaks_batch call
+CHANNEL_BATCH_MIN_ROWS = 4
+
+ChannelPeaks = namedtuple('ChannelPeaks', ['positions', 'amps', 'aggregate_positions', 'aggregate_amps', 'spectrum'])
+
+# Multi-channel arrays keep the channel axis second to last: (channels x bins) for one
+# frame, (frames x channels x bins) for a spectrogram, so rows stay contiguous per channel
+def aggregate_channels(spectra, mode='sum', out=None):
+    if mode == 'sum':
+        return np.sum(spectra, axis=-2, out=out)
+    if mode == 'max':
+        return np.max(spectra, axis=-2, out=out)
+    raise ValueError(f"Unknown channel aggregate {mode!r}, expected one of {CHANNEL_AGGREGATES}")
+
+# Top k peaks of every channel and of their aggregate with one find_peaks_batch call: the
+# aggregate spectrum is stacked under the channels as one more row (fewer than
+# CHANNEL_BATCH_MIN_ROWS rows go through find_peaks one by one). positions/amps are
+# (..., channels x k), aggregate_positions/aggregate_amps (..., k), and spectrum is the
+# aggregate itself (for the bars). Missing peaks have nan positions and zero amplitudes.
+def channel_peaks(spectra, k, aggregate='sum', min_distance=1, threshold=0.0, interpolation='gaussian', lo=0, hi=None):
+    spectra = np.asarray(spectra)
+    combined = aggregate_channels(spectra, aggregate)
+    rows = np.concatenate([spectra, combined[..., None, :]], axis=-2)
+    flat = rows.reshape(-1, rows.shape[-1])
+    if len(flat) >= CHANNEL_BATCH_MIN_ROWS:
+        positions, amps = find_peaks_batch(flat, k, min_distance, threshold, interpolation, lo, hi)
+    else:
+        positions, amps = np.full((len(flat), k), np.nan), np.zeros((len(flat), k))
+        for row, spectrum in enumerate(flat):
+            found, values = find_peaks(spectrum, k, min_distance, threshold, interpolation, lo, hi)
+            positions[row, :len(found)], amps[row, :len(values)] = found, values
+    shape = rows.shape[:-1] + (positions.shape[-1],)
+    positions, amps = positions.reshape(shape), amps.reshape(shape)
+    return ChannelPeaks(positions[..., :-1, :], amps[..., :-1, :], positions[..., -1, :], amps[..., -1, :], combined)
+
+# --channels / --aggregate options shared by the live scripts
+def add_channel_arguments(parser):
+    parser.add_argument('--channels', type=int, default=1,
+                        help="input channels to capture; with more than one every channel is transformed in one batch")
+    parser.add_argument('--aggregate', choices=CHANNEL_AGGREGATES, default='sum',
+                        help="how channel spectra are combined for the bars and the main peak table")
+    return parser
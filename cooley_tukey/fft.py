@@ -0,0 +1,59 @@
+import numpy as np
+
+from .kernels import is_power_of_two
+from .parallel import get_parallel_plan
+from .planner import get_plan
+
+# Original recursive Cooley–Tukey FFT, kept as a reference implementation
+def cooley_tukey_fft_recursive(x):
+    N = len(x)
+    if N <= 1:
+        return x
+    if N % 2 != 0:
+        raise ValueError("Size of x must be a power of 2")
+
+    # Divide: even and odd indexed elements
+    even_fft = cooley_tukey_fft_recursive(x[::2])
+    odd_fft = cooley_tukey_fft_recursive(x[1::2])
+
+    # Combine with normalization to match np.fft.fft
+    factor = np.exp(-2j * np.pi * np.arange(N) / N)
+    return np.concatenate([even_fft + factor[:N // 2] * odd_fft,
+                           even_fft - factor[:N // 2] * odd_fft])
+
+# Iterative in-place radix-2 Cooley–Tukey FFT (same output as np.fft.fft); threads > 1
+# runs long transforms as a four-step FFT on that many threads (cooley_tukey.parallel)
+def cooley_tukey_fft(x, threads=None):
+    x = np.asarray(x)
+    N = len(x)
+    if N <= 1:
+        return x
+    if not is_power_of_two(N):
+        raise ValueError("Size of x must be a power of 2")
+
+    # Cached plan: twiddles, permutation and scratch are built once per size
+    plan = get_parallel_plan(N, np.complex128, threads) if threads and threads > 1 else get_plan(N, np.complex128)
+    return plan.execute(x).copy()
+
+# FFT of any length: the planner picks radix-2, mixed-radix or Bluestein (same output as np.fft.fft)
+def fft(x):
+    x = np.asarray(x)
+    return get_plan(len(x), np.complex128).execute(x).copy()
+
+# Inverse FFT of any length, computed as conj(fft(conj(X))) / N (same output as np.fft.ifft)
+def ifft(X):
+    X = np.asarray(X)
+    N = len(X)
+    result = get_plan(N, np.complex128).execute(np.conj(X)).copy()
+    np.conjugate(result, out=result)
+    result /= N
+    return result
+
+# Function to pad the signal to the nearest power of 2
+# (allocates on every call; live loops should reuse FFTPlan.pad instead)
+def pad_to_power_of_two(signal):
+    N = len(signal)
+    next_power_of_two = 2**int(np.ceil(np.log2(N)))
+    padded_signal = np.zeros(next_power_of_two)
+    padded_signal[:N] = signal
+    return padded_signal
@@ -0,0 +1,188 @@
+import json
+import math
+import sys
+import time
+
+# Histogram bins: 20 per decade (about 12% wide) from 100 ns to 10 s, plus one
+# underflow and one overflow bin, so recording is O(1) and memory is fixed
+HISTOGRAM_MIN_SECONDS = 1e-7
+HISTOGRAM_DECADES = 8
+HISTOGRAM_BINS_PER_DECADE = 20
+
+# Seconds between summary lines of a live run
+DEFAULT_REPORT_INTERVAL = 5.0
+
+# sounddevice CallbackFlags attributes counted by count_status
+STATUS_FLAGS = ('input_overflow', 'input_underflow', 'output_overflow', 'output_underflow', 'priming_output')
+
+# Fixed-size log-spaced histogram of durations in seconds; quantiles are read back as the
+# upper edge of the bin they fall in (at most one bin width, ~12%, above the true value)
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (HISTOGRAM_DECADES * HISTOGRAM_BINS_PER_DECADE + 2)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.offset = -math.log10(HISTOGRAM_MIN_SECONDS)
+
+    def record(self, seconds):
+        if seconds > 0:
+            index = int((math.log10(seconds) + self.offset) * HISTOGRAM_BINS_PER_DECADE) + 1
+            index = min(max(index, 0), len(self.counts) - 1)
+        else:
+            index = 0
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    # Upper edge of bin i (the underflow bin ends at the minimum, the overflow bin at the max seen)
+    def edge(self, index):
+        if index >= len(self.counts) - 1:
+            return self.max
+        return HISTOGRAM_MIN_SECONDS * 10 ** (index / HISTOGRAM_BINS_PER_DECADE)
+
+    def quantile(self, q):
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target and count:
+                return min(self.edge(index), self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'p50': self.quantile(0.50),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'max': self.max,
+        }
+
+# Per-stage timings of a live loop on the monotonic clock, plus event counters.
+# start() marks the beginning of an iteration and each lap(stage) records the time since
+# the previous mark, so timing a stage costs one perf_counter call and one histogram update.
+# record() takes a duration measured elsewhere (e.g. in the audio callback thread; each
+# stage should be recorded from one thread only).
+class StageProfiler:
+    enabled = True
+
+    def __init__(self, report_interval=DEFAULT_REPORT_INTERVAL, file=sys.stderr):
+        self.histograms = {}
+        self.counters = {}
+        self.report_interval = report_interval
+        self.file = file
+        self.created = time.perf_counter()
+        self.last = self.created
+        self.last_report = self.created
+
+    def start(self):
+        self.last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.record(stage, now - self.last)
+        self.last = now
+
+    def record(self, stage, seconds):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = Histogram()
+        histogram.record(seconds)
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    # Count the flags set in a sounddevice callback status
+    def count_status(self, status):
+        for flag in STATUS_FLAGS:
+            if getattr(status, flag, False):
+                self.count(flag)
+
+    def snapshot(self):
+        return {
+            'elapsed': time.perf_counter() - self.created,
+            'stages': {stage: histogram.summary() for stage, histogram in self.histograms.items()},
+            'counters': dict(self.counters),
+        }
+
+    # One line: per-stage p50/p95/p99/max in microseconds, then the counters
+    def summary(self):
+        parts = []
+        for stage, histogram in self.histograms.items():
+            s = histogram.summary()
+            parts.append(f"{stage} n={s['count']} p50={s['p50'] * 1e6:.0f} p95={s['p95'] * 1e6:.0f} "
+                         f"p99={s['p99'] * 1e6:.0f} max={s['max'] * 1e6:.0f}")
+        parts.extend(f"{name}={value}" for name, value in self.counters.items())
+        return "[profile us] " + " | ".join(parts)
+
+    # Print the summary line if report_interval seconds have passed since the last one
+    def report_if_due(self):
+        now = time.perf_counter()
+        if self.report_interval and now - self.last_report >= self.report_interval:
+            self.last_report = now
+            print(self.summary(), file=self.file)
+
+    # Write the snapshot plus the raw histogram counts and bin edges as JSON
+    def dump(self, path):
+        data = self.snapshot()
+        data['histograms'] = {stage: histogram.counts for stage, histogram in self.histograms.items()}
+        data['bin_edges'] = [HISTOGRAM_MIN_SECONDS * 10 ** (i / HISTOGRAM_BINS_PER_DECADE)
+                             for i in range(HISTOGRAM_DECADES * HISTOGRAM_BINS_PER_DECADE + 1)]
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=1)
+
+# Stand-in used when profiling is off: every method is an empty call
+class NullProfiler:
+    enabled = False
+
+    def start(self):
+        pass
+
+    def lap(self, stage):
+        pass
+
+    def record(self, stage, seconds):
+        pass
+
+    def count(self, name, n=1):
+        pass
+
+    def count_status(self, status):
+        pass
+
+    def report_if_due(self):
+        pass
+
+    def summary(self):
+        return ''
+
+    def dump(self, path):
+        pass
+
+# --profile / --profile-interval / --profile-dump options shared by the live scripts
+def add_profile_arguments(parser):
+    parser.add_argument('--profile', action='store_true', help="time every pipeline stage and print p50/p95/p99/max")
+    parser.add_argument('--profile-interval', type=float, default=DEFAULT_REPORT_INTERVAL,
+                        help="seconds between profile summary lines (0 = only at exit)")
+    parser.add_argument('--profile-dump', help="write the stage histograms to this JSON file at exit")
+    return parser
+
+# StageProfiler when --profile or --profile-dump is given, otherwise a NullProfiler
+def profiler_from_args(args):
+    if not (args.profile or args.profile_dump):
+        return NullProfiler()
+    return StageProfiler(args.profile_interval if args.profile else 0)
+
+# Print the final summary and write the dump file requested on the command line
+def finish_profile(profiler, args):
+    if not profiler.enabled:
+        return
+    print(profiler.summary(), file=sys.stderr)
+    if args.profile_dump:
+        profiler.dump(args.profile_dump)
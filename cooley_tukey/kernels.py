@@ -0,0 +1,168 @@
+import numpy as np
+
+# Butterfly kernels selectable per plan for power-of-two sizes
+KERNELS = ('radix2', 'radix4', 'split')
+
+# Check that N is a power of 2 (the iterative engine only handles these sizes)
+def is_power_of_two(N):
+    return N >= 1 and (N & (N - 1)) == 0
+
+# Bit-reversal permutation of the indices 0..N-1
+def bit_reverse_indices(N):
+    bits = N.bit_length() - 1
+    indices = np.arange(N)
+    reversed_indices = np.zeros(N, dtype=np.intp)
+    for _ in range(bits):
+        reversed_indices = (reversed_indices << 1) | (indices & 1)
+        indices >>= 1
+    return reversed_indices
+
+# Order in which a mixed-radix transform visits the input (generalized bit reversal)
+def digit_reverse_indices(n, factors):
+    indices = np.arange(n).reshape(1, n)
+    for r in factors:
+        rows, length = indices.shape
+        indices = indices.reshape(rows, length // r, r).transpose(0, 2, 1).reshape(rows * r, length // r)
+    return indices.reshape(n)
+
+# Twiddle factors exp(-2j*pi*k/N) for k < N/2; stage m uses every (N/2m)-th entry
+def twiddle_factors(N, dtype=np.complex128):
+    return np.exp(-2j * np.pi * np.arange(N // 2) / N).astype(dtype)
+
+# Run the log2(N) butterfly stages in place on a bit-reversed buffer;
+# leading axes of a (..., N) buffer are independent frames transformed in the same pass
+def butterfly_stages(buffer, twiddles, scratch):
+    N = buffer.shape[-1]
+    lead = buffer.shape[:-1]
+    half = scratch.reshape(-1)[:buffer.size // 2]
+    m = 1
+    while m < N:
+        # View the buffer as (..., blocks, 2, m): row 0 holds the even half, row 1 the odd half
+        blocks = buffer.reshape(lead + (N // (2 * m), 2, m))
+        even = blocks[..., 0, :]
+        odd = blocks[..., 1, :]
+        t = half.reshape(lead + (N // (2 * m), m))
+        if m == 1:
+            # First stage: every twiddle is 1, so no complex multiplication is needed
+            np.copyto(t, odd)
+        else:
+            np.multiply(odd, twiddles[::N // (2 * m)], out=t)
+        np.subtract(even, t, out=odd)
+        np.add(even, t, out=even)
+        m *= 2
+    return buffer
+
+# Radix-4 factorization of a power of two: 4s, plus one 2 when log2(N) is odd
+def radix4_factors(N):
+    bits = N.bit_length() - 1
+    return [4] * (bits // 2) + [2] * (bits % 2)
+
+# Per-stage tables for radix4_stages: (radix, m, twiddles W_{rm}^(n1*k1) for n1, k1 >= 1)
+def radix4_tables(N, dtype=np.complex128):
+    stages = []
+    m = 1
+    for r in reversed(radix4_factors(N)):
+        twiddles = None
+        if m > 1:
+            n1 = np.arange(1, r)[:, None]
+            k1 = np.arange(1, m)[None, :]
+            twiddles = np.exp(-2j * np.pi * n1 * k1 / (r * m)).astype(dtype)
+        stages.append((r, m, twiddles))
+        m *= r
+    return stages
+
+# Multiply by -1j without a complex multiplication: swap real and imaginary parts
+def rotate_minus_j(v, out):
+    real = v.real.copy()
+    out.real[...] = v.imag
+    np.negative(real, out=out.imag)
+    return out
+
+# Radix-4 stages (with one leading radix-2 stage for odd log2(N)) on a digit-reversed buffer.
+# Twiddles in row/column 0 are 1 and the inner rotation by -1j is done on real/imaginary parts.
+def radix4_stages(buffer, stages, scratch):
+    N = buffer.shape[-1]
+    lead = buffer.shape[:-1]
+    quarter = buffer.size // 4 or 1
+    for r, m, twiddles in stages:
+        blocks = buffer.reshape(lead + (N // (r * m), r, m))
+        if r == 2:
+            y0, y1 = blocks[..., 0, :], blocks[..., 1, :]
+            t = scratch[0, :buffer.size // 2].reshape(y1.shape)
+            np.copyto(t, y1)
+            np.subtract(y0, t, out=y1)
+            np.add(y0, t, out=y0)
+            continue
+
+        if twiddles is not None:
+            blocks[..., 1:, 1:] *= twiddles
+        y0, y1, y2, y3 = (blocks[..., j, :] for j in range(4))
+        a, b, c, d = (scratch[j, :quarter].reshape(y0.shape) for j in range(4))
+        np.add(y0, y2, out=a)
+        np.subtract(y0, y2, out=b)
+        np.add(y1, y3, out=c)
+        np.subtract(y1, y3, out=d)
+        np.add(a, c, out=y0)
+        np.subtract(a, c, out=y2)
+        # y1 = b - 1j*d and y3 = b + 1j*d, written as real/imaginary updates
+        np.add(b.real, d.imag, out=y1.real)
+        np.subtract(b.imag, d.real, out=y1.imag)
+        np.subtract(b.real, d.imag, out=y3.real)
+        np.add(b.imag, d.real, out=y3.imag)
+    return buffer
+
+# Tables for the iterative split-radix (Sorensen) decimation-in-frequency FFT:
+# one entry per L-shaped stage (first indices, quarter length, W^j and W^3j),
+# plus the start indices of the final length-2 butterflies
+def split_radix_tables(N, dtype=np.complex128):
+    stages = []
+    n2 = 2 * N
+    for _ in range(N.bit_length() - 2):
+        n2 //= 2
+        n4 = n2 // 4
+        starts = []
+        start, step = 0, 2 * n2
+        while start < N - 1:
+            starts.extend(range(start, N - 1, step))
+            start, step = 2 * step - n2, 4 * step
+        j = np.arange(n4)
+        first = (np.array(starts, dtype=np.intp)[:, None] + j[None, :]).reshape(-1)
+        w1 = np.exp(-2j * np.pi * j / n2).astype(dtype)
+        w3 = np.exp(-6j * np.pi * j / n2).astype(dtype)
+        stages.append((first, n4, np.tile(w1, len(starts)), np.tile(w3, len(starts))))
+
+    pairs = []
+    start, step = 0, 4
+    while start < N - 1:
+        pairs.extend(range(start, N, step))
+        start, step = 2 * step - 2, 4 * step
+    return stages, np.array(pairs, dtype=np.intp)
+
+# Split-radix stages in place on a natural-order buffer; the result is bit-reversed
+def split_radix_stages(buffer, stages, pairs):
+    for first, n4, w1, w3 in stages:
+        x0 = buffer[..., first]
+        x1 = buffer[..., first + n4]
+        x2 = buffer[..., first + 2 * n4]
+        x3 = buffer[..., first + 3 * n4]
+        a = x0 - x2
+        b = x1 - x3
+        x0 += x2
+        x1 += x3
+        # (a - 1j*b) * W^j and (a + 1j*b) * W^3j, with -1j*b done as a real/imaginary swap
+        rotate_minus_j(b, b)
+        np.add(a, b, out=x2)
+        np.subtract(a, b, out=x3)
+        x2 *= w1
+        x3 *= w3
+        buffer[..., first] = x0
+        buffer[..., first + n4] = x1
+        buffer[..., first + 2 * n4] = x2
+        buffer[..., first + 3 * n4] = x3
+
+    if len(pairs):
+        y0 = buffer[..., pairs]
+        y1 = buffer[..., pairs + 1]
+        buffer[..., pairs] = y0 + y1
+        buffer[..., pairs + 1] = y0 - y1
+    return buffer
@@ -0,0 +1,217 @@
+import numpy as np
+
+from .kernels import digit_reverse_indices
+from .plan import FFTPlan, complex_dtype_for, pad_into
+
+# Split n into radices: 4s and 2 first, then 3 and 5, then any remaining primes
+def factorize(n):
+    factors = []
+    while n % 4 == 0:
+        factors.append(4)
+        n //= 4
+    for p in (2, 3, 5):
+        while n % p == 0:
+            factors.append(p)
+            n //= p
+    p = 7
+    while p * p <= n:
+        while n % p == 0:
+            factors.append(p)
+            n //= p
+        p += 2
+    if n > 1:
+        factors.append(n)
+    return factors
+
+# Radix-r butterflies: y is the list of r (already twiddled) inputs, returns the r outputs
+def radix2_kernel(y):
+    return [y[0] + y[1], y[0] - y[1]]
+
+def radix3_kernel(y):
+    t = y[1] + y[2]
+    u = y[0] - 0.5 * t
+    v = (-1j * np.sqrt(3) / 2) * (y[1] - y[2])
+    return [y[0] + t, u + v, u - v]
+
+def radix4_kernel(y):
+    a = y[0] + y[2]
+    b = y[0] - y[2]
+    c = y[1] + y[3]
+    d = -1j * (y[1] - y[3])
+    return [a + c, b + d, a - c, b - d]
+
+def radix5_kernel(y):
+    c1, c2 = np.cos(2 * np.pi / 5), np.cos(4 * np.pi / 5)
+    s1, s2 = np.sin(2 * np.pi / 5), np.sin(4 * np.pi / 5)
+    t1 = y[1] + y[4]
+    t2 = y[2] + y[3]
+    t3 = y[1] - y[4]
+    t4 = y[2] - y[3]
+    a1 = y[0] + c1 * t1 + c2 * t2
+    a2 = y[0] + c2 * t1 + c1 * t2
+    b1 = -1j * (s1 * t3 + s2 * t4)
+    b2 = -1j * (s2 * t3 - s1 * t4)
+    return [y[0] + t1 + t2, a1 + b1, a2 + b2, a2 - b2, a1 - b1]
+
+RADIX_KERNELS = {2: radix2_kernel, 3: radix3_kernel, 4: radix4_kernel, 5: radix5_kernel}
+
+# Mixed-radix Cooley–Tukey FFT for any n: digit-reversal permutation, then one
+# in-place vectorized stage per factor (specialized kernels for 2, 3, 4, 5 and a
+# dense DFT matrix for any other radix)
+class MixedRadixPlan:
+    def __init__(self, n, dtype=np.complex128):
+        self.n = n
+        self.dtype = complex_dtype_for(dtype)
+        self.real_dtype = np.empty(0, self.dtype).real.dtype
+        self.factors = factorize(n)
+        self.permutation = digit_reverse_indices(n, self.factors)
+
+        # Stages run from the innermost factor outwards; stage (r, m) needs W_{rm}^(n1*k1)
+        self.stages = []
+        m = 1
+        for r in reversed(self.factors):
+            twiddles = np.exp(-2j * np.pi * np.outer(np.arange(r), np.arange(m)) / (r * m)).astype(self.dtype)
+            matrix = None
+            if r not in RADIX_KERNELS:
+                matrix = np.exp(-2j * np.pi * np.outer(np.arange(r), np.arange(r)) / r).astype(self.dtype)
+            self.stages.append((r, m, twiddles[1:] if m > 1 else None, matrix))
+            m *= r
+
+        self.buffer = np.empty(n, dtype=self.dtype)
+        self.padded = np.zeros(n, dtype=self.real_dtype)
+
+    @property
+    def nbytes(self):
+        total = self.permutation.nbytes + self.buffer.nbytes + self.padded.nbytes
+        for _, _, twiddles, matrix in self.stages:
+            total += twiddles.nbytes if twiddles is not None else 0
+            total += matrix.nbytes if matrix is not None else 0
+        return total
+
+    def pad(self, signal):
+        return pad_into(self.padded, signal)
+
+    def run_stages(self, buffer):
+        lead = buffer.shape[:-1]
+        for r, m, twiddles, matrix in self.stages:
+            blocks = buffer.reshape(lead + (self.n // (r * m), r, m))
+            if twiddles is not None:
+                blocks[..., 1:, :] *= twiddles
+            if matrix is None:
+                outputs = RADIX_KERNELS[r]([blocks[..., j, :] for j in range(r)])
+                for j in range(r):
+                    blocks[..., j, :] = outputs[j]
+            else:
+                blocks[...] = np.einsum('kj,...jm->...km', matrix, blocks)
+        return buffer
+
+    def execute(self, x, out=None):
+        x = np.asarray(x)
+        if len(x) != self.n:
+            raise ValueError(f"Input of length {len(x)} does not match a plan of size {self.n}")
+        if out is None:
+            out = self.buffer
+        out[...] = x[self.permutation]
+        return self.run_stages(out)
+
+    def execute_batch(self, x, out=None):
+        x = np.asarray(x)
+        if x.shape[-1] != self.n:
+            raise ValueError(f"Rows of length {x.shape[-1]} do not match a plan of size {self.n}")
+        if out is None:
+            out = np.empty(x.shape, dtype=self.dtype)
+        out[...] = x[..., self.permutation]
+        return self.run_stages(out)
+
+    def __repr__(self):
+        return f"MixedRadixPlan(n={self.n}, factors={self.factors}, dtype={self.dtype})"
+
+# Bluestein (chirp-z) FFT for any n: the DFT is rewritten as a circular convolution
+# with the chirp exp(-1j*pi*k^2/n), evaluated with power-of-two radix-2 transforms
+class BluesteinPlan:
+    def __init__(self, n, dtype=np.complex128):
+        self.n = n
+        self.dtype = complex_dtype_for(dtype)
+        self.real_dtype = np.empty(0, self.dtype).real.dtype
+        self.m = bluestein_size(n)
+        self.conv_plan = FFTPlan(self.m, self.dtype)
+
+        # k^2 mod 2n keeps the chirp phase exact for large k
+        k = np.arange(n)
+        self.chirp = np.exp(-1j * np.pi * ((k * k) % (2 * n)) / n).astype(self.dtype)
+        b = np.zeros(self.m, dtype=self.dtype)
+        b[:n] = np.conj(self.chirp)
+        b[self.m - n + 1:] = np.conj(self.chirp[1:])[::-1]
+        self.chirp_spectrum = self.conv_plan.execute(b).copy()
+        self.chirp_spectrum /= self.m  # Fold the inverse transform's 1/m into the filter
+
+        self.work = np.zeros(self.m, dtype=self.dtype)
+        self.buffer = np.empty(n, dtype=self.dtype)
+        self.padded = np.zeros(n, dtype=self.real_dtype)
+
+    @property
+    def nbytes(self):
+        arrays = (self.chirp, self.chirp_spectrum, self.work, self.buffer, self.padded)
+        return self.conv_plan.nbytes + sum(a.nbytes for a in arrays)
+
+    def pad(self, signal):
+        return pad_into(self.padded, signal)
+
+    # Convolve the chirped rows of a with the chirp; the result is written back into a
+    def convolve(self, a, execute):
+        spectrum = execute(a, None)
+        spectrum *= self.chirp_spectrum
+        # Inverse FFT as conj(fft(conj(.))); the 1/m is already in chirp_spectrum
+        np.conjugate(spectrum, out=spectrum)
+        result = execute(spectrum, a)
+        np.conjugate(result, out=result)
+        return result
+
+    def execute(self, x, out=None):
+        x = np.asarray(x)
+        if len(x) != self.n:
+            raise ValueError(f"Input of length {len(x)} does not match a plan of size {self.n}")
+        if out is None:
+            out = self.buffer
+        a = self.work
+        np.multiply(x, self.chirp, out=a[:self.n])
+        a[self.n:] = 0
+        result = self.convolve(a, self.conv_plan.execute)
+        np.multiply(result[:self.n], self.chirp, out=out)
+        return out
+
+    def execute_batch(self, x, out=None):
+        x = np.asarray(x)
+        if x.shape[-1] != self.n:
+            raise ValueError(f"Rows of length {x.shape[-1]} do not match a plan of size {self.n}")
+        if out is None:
+            out = np.empty(x.shape, dtype=self.dtype)
+        a = np.zeros(x.shape[:-1] + (self.m,), dtype=self.dtype)
+        np.multiply(x, self.chirp, out=a[..., :self.n])
+        result = self.convolve(a, self.conv_plan.execute_batch)
+        np.multiply(result[..., :self.n], self.chirp, out=out)
+        return out
+
+    def __repr__(self):
+        return f"BluesteinPlan(n={self.n}, m={self.m}, dtype={self.dtype})"
+
+# Power-of-two convolution length Bluestein needs for size n
+def bluestein_size(n):
+    m = 1
+    while m < 2 * n - 1:
+        m *= 2
+    return m
+
+# Rough cost estimates in radix-2 butterfly units, used by the size planner
+RADIX_COSTS = {2: 1.0, 3: 1.7, 4: 1.5, 5: 2.6}
+
+def mixed_radix_cost(n):
+    return n * sum(RADIX_COSTS.get(r, r) for r in factorize(n))
+
+def bluestein_cost(n):
+    m = bluestein_size(n)
+    return 2 * m * np.log2(m) + 3 * m
+
+def radix2_cost(n):
+    return n * np.log2(max(n, 2))
+
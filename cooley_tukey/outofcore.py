@@ -0,0 +1,145 @@
+import os
+import tempfile
+
+import numpy as np
+
+from .parallel import four_step_factors, get_parallel_plan
+from .plan import complex_dtype_for
+from .planner import get_plan
+
+# Default bytes of tile data held in memory at once
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+
+# Tile-sized arrays alive during one FFT pass: the rows read from disk, the transform
+# output, the plan's scratch (up to two) and the twiddles; a transpose only holds the
+# rows it read and their complex copy
+FFT_TILE_COPIES = 5
+TRANSPOSE_TILE_COPIES = 2
+
+# Rows of `width` complex values per tile so that `copies` tile-sized arrays fit the budget
+def tile_rows(rows, width, itemsize, memory_budget, copies):
+    count = memory_budget // (width * itemsize * copies)
+    if count < 1:
+        raise ValueError(f"A memory budget of {memory_budget} bytes cannot hold one row of "
+                         f"{width} values; give at least {width * itemsize * copies} bytes")
+    return min(count, rows)
+
+# Rows `rows` of the (n1 x n2) matrix view x[n2*j1 + j2] as an in-memory tile, read as one
+# contiguous run; positions past the end of x (zero padding up to n = n1*n2) read as zeros
+def read_rows(x, n2, rows, dtype):
+    tile = np.zeros((rows.stop - rows.start, n2), dtype=dtype)
+    run = x[rows.start * n2:min(len(x), rows.stop * n2)]
+    tile.reshape(-1)[:len(run)] = run
+    return tile
+
+# Row-major (rows x cols) matrix stored in an unbuffered file from byte `offset` on,
+# accessed with seek/readinto/write rather than a memory map, so the only resident data is
+# the tile being worked on and the kernel writes the rest back and evicts it as needed
+class MatrixFile:
+    def __init__(self, file, offset, rows, cols, dtype):
+        self.file = file
+        self.offset = offset
+        self.rows = rows
+        self.cols = cols
+        self.dtype = np.dtype(dtype)
+        self.row_bytes = cols * self.dtype.itemsize
+
+    def read_rows(self, rows):
+        tile = np.empty((rows.stop - rows.start, self.cols), dtype=self.dtype)
+        view = tile.reshape(-1).view(np.uint8)
+        self.file.seek(self.offset + rows.start * self.row_bytes)
+        done = 0
+        while done < len(view):
+            done += self.file.readinto(view[done:])
+        return tile
+
+    def write_rows(self, rows, tile):
+        self.write(self.offset + rows.start * self.row_bytes, np.ascontiguousarray(tile, dtype=self.dtype))
+
+    # tile is (self.rows x width): row r goes to columns cols of row r, one segment per row
+    def write_columns(self, cols, tile):
+        tile = np.ascontiguousarray(tile, dtype=self.dtype)
+        position = self.offset + cols.start * self.dtype.itemsize
+        for row in tile:
+            self.write(position, row)
+            position += self.row_bytes
+
+    def write(self, position, data):
+        view = data.reshape(-1).view(np.uint8)
+        self.file.seek(position)
+        done = 0
+        while done < len(view):
+            done += self.file.write(view[done:])
+
+# Blocked transpose of the (rows x cols) matrix read_tile describes into dst (cols x rows):
+# each tile is a run of whole source rows (one contiguous read) written as a run of
+# columns of dst, i.e. one contiguous segment of tile-height values in every dst row,
+# so both files are streamed through once per transpose
+def transpose_into(read_tile, dst, rows, cols, memory_budget):
+    height = tile_rows(rows, cols, dst.dtype.itemsize, memory_budget, TRANSPOSE_TILE_COPIES)
+    for start in range(0, rows, height):
+        block = slice(start, min(start + height, rows))
+        dst.write_columns(block, read_tile(block).T)
+
+# Row transforms of length matrix.cols, in place, tile by tile of contiguous rows;
+# twiddles(block) (optional) is multiplied into each tile
+def transform_rows(matrix, plan, memory_budget, twiddles=None):
+    height = tile_rows(matrix.rows, matrix.cols, matrix.dtype.itemsize, memory_budget, FFT_TILE_COPIES)
+    for start in range(0, matrix.rows, height):
+        block = slice(start, min(start + height, matrix.rows))
+        result = plan.execute_batch(matrix.read_rows(block))
+        if twiddles is not None:
+            result *= twiddles(block)
+        matrix.write_rows(block, result)
+
+# Twiddles W_n^(j2*k1) of rows j2 in `rows`; the exponent is reduced mod n first so the
+# phase stays exact for the large products of multi-gigabyte transforms
+def four_step_twiddles(rows, n1, n, dtype):
+    exponent = np.outer(np.arange(rows.start, rows.stop, dtype=np.int64), np.arange(n1, dtype=np.int64)) % n
+    return np.exp(exponent * (-2j * np.pi / n)).astype(dtype)
+
+# FFT of a signal that does not fit in memory (same output as np.fft.fft(x, n)).
+# x is any 1-D array, usually a memory map (np.load(..., mmap_mode='r'), np.memmap or a
+# WavStream channel); the spectrum is written to out_path as a .npy file, which is
+# returned memory-mapped read-only (reopen it later with np.load(out_path, mmap_mode='r')).
+# Six-step (Bailey) decomposition with n = n1 * n2, x viewed as an (n1 x n2) matrix, so
+# that both FFT passes read and write whole contiguous rows:
+#   1. blocked transpose of x into the output file, viewed as (n2 x n1);
+#   2. FFT of length n1 along every row, times the twiddles W_n^(j2*k1);
+#   3. blocked transpose into a scratch file, viewed as (n1 x n2);
+#   4. FFT of length n2 along every row, giving X[k1 + n1*k2] at row k1, column k2;
+#   5. blocked transpose back into the output file, which leaves X in natural order.
+# Every pass streams through the files once in tiles sized to memory_budget bytes, so only
+# about memory_budget plus the plans are resident. The scratch file (n complex values)
+# goes next to out_path unless scratch_dir is given and is removed afterwards. n defaults
+# to len(x) and must have a factor pair (use a power of two to zero-pad). threads > 1
+# splits every tile over a thread pool.
+def out_of_core_fft(x, out_path, n=None, memory_budget=DEFAULT_MEMORY_BUDGET, dtype=np.complex128,
+                    threads=None, scratch_dir=None):
+    n = len(x) if n is None else n
+    if len(x) > n:
+        raise ValueError(f"Signal of length {len(x)} does not fit a transform of size {n}")
+    factors = four_step_factors(n)
+    if factors is None:
+        raise ValueError(f"Size {n} has no four-step factorization; pad to a power of two")
+    n1, n2 = factors
+    dtype = complex_dtype_for(dtype)
+    if threads and threads > 1:
+        first, second = get_parallel_plan(n1, dtype, threads), get_parallel_plan(n2, dtype, threads)
+    else:
+        first, second = get_plan(n1, dtype), get_plan(n2, dtype)
+
+    directory = scratch_dir or os.path.dirname(os.path.abspath(out_path))
+    with open(out_path, 'wb+', buffering=0) as out_file, \
+            tempfile.TemporaryFile(dir=directory, buffering=0) as scratch_file:
+        header = {'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)), 'fortran_order': False, 'shape': (n,)}
+        np.lib.format.write_array_header_1_0(out_file, header)
+        columns = MatrixFile(out_file, out_file.tell(), n2, n1, dtype)
+        rows = MatrixFile(scratch_file, 0, n1, n2, dtype)
+
+        transpose_into(lambda block: read_rows(x, n2, block, dtype), columns, n1, n2, memory_budget)
+        transform_rows(columns, first, memory_budget, lambda block: four_step_twiddles(block, n1, n, dtype))
+        transpose_into(columns.read_rows, rows, n2, n1, memory_budget)
+        transform_rows(rows, second, memory_budget)
+        transpose_into(rows.read_rows, columns, n1, n2, memory_budget)
+    return np.load(out_path, mmap_mode='r')
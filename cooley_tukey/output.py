@@ -0,0 +1,129 @@
+import json
+import sys
+
+import numpy as np
+
+# Structured per-frame output for headless runs: one record per analysed frame
+# with the top peak frequencies/amplitudes and, for detectors, a status.
+# Multi-channel runs add the peaks of every channel: write(..., channels=(freqs, amps))
+# with (channels x peaks) arrays, the main freqs/amps being the cross-channel aggregate.
+OUTPUT_FORMATS = ('jsonl', 'binary')
+
+# Binary stream header: magic, format version, peaks per record (version 2 adds a channel
+# count byte and per-channel peaks; single-channel files are still written as version 1)
+BINARY_MAGIC = b'FFTR'
+BINARY_VERSION = 1
+BINARY_CHANNEL_VERSION = 2
+
+# Status codes stored in binary records (JSON lines carry the string instead)
+STATUS_CODES = {None: -1, 'locked': 0, 'unlocked': 1}
+
+# numpy record layout of one binary frame: 13 + 8 * peaks (+ 8 * channels * peaks) bytes
+def binary_record_dtype(peaks, channels=0):
+    fields = [('frame', '<u4'), ('time', '<f8'), ('freqs', '<f4', (peaks,)),
+              ('amps', '<f4', (peaks,)), ('status', 'i1')]
+    if channels:
+        fields += [('channel_freqs', '<f4', (channels, peaks)), ('channel_amps', '<f4', (channels, peaks))]
+    return np.dtype(fields)
+
+# Open a file for writing, '-' meaning stdout
+def open_output(path, binary):
+    if path == '-':
+        return sys.stdout.buffer if binary else sys.stdout
+    return open(path, 'wb' if binary else 'w')
+
+# One JSON object per line: {"frame", "time", "freqs", "amps"[, "status"][, "channels"]},
+# "channels" being one {"freqs", "amps"} object per channel without the zero-amplitude padding
+class JsonLinesWriter:
+    def __init__(self, path='-', flush=True):
+        self.file = open_output(path, binary=False)
+        self.flush = flush
+
+    def write(self, frame, time, freqs, amps, status=None, channels=None):
+        record = {'frame': frame, 'time': round(time, 6),
+                  'freqs': [round(float(f), 2) for f in freqs],
+                  'amps': [round(float(a), 4) for a in amps]}
+        if status is not None:
+            record['status'] = status
+        if channels is not None:
+            record['channels'] = [{'freqs': [round(float(f), 2) for f, a in zip(row_freqs, row_amps) if a > 0],
+                                   'amps': [round(float(a), 4) for a in row_amps if a > 0]}
+                                  for row_freqs, row_amps in zip(*channels)]
+        self.file.write(json.dumps(record) + '\n')
+        if self.flush:
+            self.file.flush()
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+# Fixed-size little-endian records after a small header; read back with read_binary_records
+class BinaryWriter:
+    def __init__(self, path='-', peaks=4, flush=True, channels=0):
+        self.file = open_output(path, binary=True)
+        self.flush = flush
+        self.peaks = peaks
+        self.channels = channels
+        self.record = np.zeros(1, dtype=binary_record_dtype(peaks, channels))
+        if channels:
+            self.file.write(BINARY_MAGIC + bytes([BINARY_CHANNEL_VERSION, peaks, channels]))
+        else:
+            self.file.write(BINARY_MAGIC + bytes([BINARY_VERSION, peaks]))
+
+    def write(self, frame, time, freqs, amps, status=None, channels=None):
+        count = min(len(freqs), self.peaks)
+        record = self.record
+        record['frame'] = frame
+        record['time'] = time
+        record['freqs'] = 0
+        record['amps'] = 0
+        record['freqs'][0, :count] = freqs[:count]
+        record['amps'][0, :count] = amps[:count]
+        record['status'] = STATUS_CODES[status]
+        if self.channels:
+            record['channel_freqs'] = 0
+            record['channel_amps'] = 0
+        if self.channels and channels is not None:
+            channel_freqs, channel_amps = (np.asarray(column)[:self.channels, :self.peaks] for column in channels)
+            rows, count = channel_amps.shape
+            record['channel_freqs'][0, :rows, :count] = np.nan_to_num(channel_freqs)
+            record['channel_amps'][0, :rows, :count] = channel_amps
+        self.file.write(self.record.tobytes())
+        if self.flush:
+            self.file.flush()
+
+    def close(self):
+        if self.file is not sys.stdout.buffer:
+            self.file.close()
+
+# Load a file written by BinaryWriter as a numpy structured array
+def read_binary_records(path):
+    with open(path, 'rb') as f:
+        header = f.read(6)
+        if header[:4] != BINARY_MAGIC or header[4] not in (BINARY_VERSION, BINARY_CHANNEL_VERSION):
+            raise ValueError(f"{path} is not a version {BINARY_VERSION} or {BINARY_CHANNEL_VERSION} binary frame file")
+        channels = f.read(1)[0] if header[4] == BINARY_CHANNEL_VERSION else 0
+        return np.frombuffer(f.read(), dtype=binary_record_dtype(header[5], channels))
+
+# Writer for one of OUTPUT_FORMATS
+def open_writer(fmt='jsonl', path='-', peaks=4, channels=0):
+    if fmt == 'jsonl':
+        return JsonLinesWriter(path)
+    if fmt == 'binary':
+        return BinaryWriter(path, peaks, channels=channels)
+    raise ValueError(f"Unknown output format {fmt!r}, expected one of {OUTPUT_FORMATS}")
+
+# Command-line switches shared by the live scripts
+def add_output_arguments(parser):
+    parser.add_argument('--headless', action='store_true',
+                        help="do not import matplotlib or open a window; write per-frame results instead")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='jsonl', help="per-frame output format")
+    parser.add_argument('--output', default=None,
+                        help="file for the per-frame results ('-' for stdout, the default when headless)")
+    return parser
+
+# Writer requested on the command line, or None when nothing should be written;
+# channels > 0 reserves per-channel peaks in binary records
+def writer_from_args(args, peaks=4, channels=0):
+    path = args.output or ('-' if args.headless else None)
+    return None if path is None else open_writer(args.format, path, peaks, channels)
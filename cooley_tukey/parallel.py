@@ -0,0 +1,173 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+
+from .plan import complex_dtype_for, pad_into
+from .planner import get_plan
+from .real import RealFFTPlan
+
+# Thread count used when none is given: set_default_threads(), else $COOLEY_TUKEY_THREADS,
+# else one thread per core
+THREADS_ENV_VAR = 'COOLEY_TUKEY_THREADS'
+default_threads = None
+
+# Single transforms below FOUR_STEP_MIN_SIZE run on the calling thread: on one core the
+# four-step passes cost about 1.5x the serial plan, which only more threads win back.
+# Batches are split once they hold PARALLEL_MIN_ELEMENTS samples, and never into blocks
+# of fewer than MIN_BLOCK_ROWS rows.
+FOUR_STEP_MIN_SIZE = 2**18
+PARALLEL_MIN_ELEMENTS = 2**15
+MIN_BLOCK_ROWS = 8
+
+# Parallel plans kept by get_parallel_plan (each holds an n-element twiddle table)
+PARALLEL_PLAN_CACHE_SIZE = 8
+
+executors = {}
+executors_lock = threading.Lock()
+
+def set_default_threads(threads):
+    global default_threads
+    default_threads = threads
+
+def resolve_threads(threads=None):
+    threads = threads or default_threads or os.environ.get(THREADS_ENV_VAR) or os.cpu_count() or 1
+    return max(1, int(threads))
+
+# One long-lived pool per thread count, shared by every parallel plan
+def get_executor(threads):
+    with executors_lock:
+        executor = executors.get(threads)
+        if executor is None:
+            executor = executors[threads] = ThreadPoolExecutor(threads, thread_name_prefix='cooley_tukey')
+        return executor
+
+# Split range(count) into up to `threads` contiguous slices of at least min_rows
+def split_rows(count, threads, min_rows=1):
+    blocks = max(1, min(threads, count // max(min_rows, 1)))
+    edges = np.linspace(0, count, blocks + 1).astype(int)
+    return [slice(start, stop) for start, stop in zip(edges[:-1], edges[1:]) if stop > start]
+
+# Balanced factor pair n = n1 * n2 with n1 <= n2, or None when n has no useful split
+def four_step_factors(n):
+    n1 = int(np.sqrt(n))
+    while n1 > 1 and n % n1:
+        n1 -= 1
+    return (n1, n // n1) if n1 >= MIN_BLOCK_ROWS else None
+
+# Complex FFT of size n spread over a thread pool; NumPy releases the GIL inside its
+# vectorized loops, so the blocks really run concurrently.
+# Batches are split into blocks of rows, each transformed by the cached single-threaded plan.
+# A single long transform uses the four-step decomposition n = n1 * n2: n2 transforms of
+# length n1 over the strided columns, a twiddle pass, then n1 transforms of length n2.
+# Each pass is a batch, split into blocks of rows as above.
+# Results of execute() live in the plan's buffer, like FFTPlan's.
+class ParallelFFTPlan:
+    def __init__(self, n, dtype=np.complex128, threads=None):
+        self.n = n
+        self.dtype = complex_dtype_for(dtype)
+        self.real_dtype = np.empty(0, self.dtype).real.dtype
+        self.threads = resolve_threads(threads)
+
+        self.factors = four_step_factors(n) if n >= FOUR_STEP_MIN_SIZE else None
+        self.twiddles = None
+        self.work = None
+        if self.factors is not None:
+            n1, n2 = self.factors
+            self.first = get_plan(n1, self.dtype)
+            self.second = get_plan(n2, self.dtype)
+            # twiddles[j2, k1] = W_n^(j2 * k1), applied between the two passes
+            self.twiddles = np.exp(-2j * np.pi * np.outer(np.arange(n2), np.arange(n1)) / n).astype(self.dtype)
+            self.work = np.empty((n2, n1), dtype=self.dtype)
+        self.buffer = np.empty(n, dtype=self.dtype)
+        self.padded = np.zeros(n, dtype=self.real_dtype)
+
+    @property
+    def nbytes(self):
+        total = self.buffer.nbytes + self.padded.nbytes
+        if self.factors is not None:
+            total += self.twiddles.nbytes + self.work.nbytes
+        return total
+
+    def pad(self, signal):
+        return pad_into(self.padded, signal)
+
+    # Run task(rows) for every block of range(count), on the pool when there is more than one
+    def map(self, task, count, min_rows=MIN_BLOCK_ROWS):
+        blocks = split_rows(count, self.threads, min_rows)
+        if len(blocks) == 1:
+            task(blocks[0])
+            return
+        executor = get_executor(self.threads)
+        for future in [executor.submit(task, rows) for rows in blocks]:
+            future.result()
+
+    def execute(self, x, out=None):
+        x = np.asarray(x)
+        if len(x) != self.n:
+            raise ValueError(f"Input of length {len(x)} does not match a plan of size {self.n}")
+        if out is None:
+            out = self.buffer
+        if self.factors is None or self.threads == 1:
+            return get_plan(self.n, self.dtype).execute(x, out)
+
+        n1, n2 = self.factors
+        grid = x.reshape(n1, n2)       # grid[j1, j2] = x[n2*j1 + j2]
+        result = out.reshape(n2, n1)   # result[k2, k1] = X[k1 + n1*k2]
+        work = self.work
+
+        def columns(rows):
+            block = self.first.execute_batch(np.ascontiguousarray(grid[:, rows].T))
+            np.multiply(block, self.twiddles[rows], out=work[rows])
+
+        def transposed_rows(rows):
+            block = self.second.execute_batch(np.ascontiguousarray(work[:, rows].T))
+            result[:, rows] = block.T
+
+        self.map(columns, n2)
+        self.map(transposed_rows, n1)
+        return out
+
+    # Transform every row of a (frames x n) array; a batch of fewer rows than threads
+    # runs its long rows through the four-step execute() instead
+    def execute_batch(self, x, out=None):
+        x = np.asarray(x)
+        if x.shape[-1] != self.n:
+            raise ValueError(f"Rows of length {x.shape[-1]} do not match a plan of size {self.n}")
+        if out is None:
+            out = np.empty(x.shape, dtype=self.dtype)
+        rows_in = x.reshape(-1, self.n)
+        rows_out = out.reshape(-1, self.n)
+        frames = len(rows_in)
+        if self.factors is not None and frames < self.threads:
+            for row, result in zip(rows_in, rows_out):
+                self.execute(row, result)
+            return out
+        plan = get_plan(self.n, self.dtype)
+        if frames * self.n < PARALLEL_MIN_ELEMENTS:
+            return plan.execute_batch(x, out)
+
+        min_rows = max(1, min(MIN_BLOCK_ROWS, PARALLEL_MIN_ELEMENTS // self.n))
+        self.map(lambda rows: plan.execute_batch(rows_in[rows], out=rows_out[rows]), frames, min_rows)
+        return out
+
+    def __repr__(self):
+        return f"ParallelFFTPlan(n={self.n}, dtype={self.dtype}, threads={self.threads}, factors={self.factors})"
+
+# Shared parallel plans per (n, dtype, threads)
+@lru_cache(maxsize=PARALLEL_PLAN_CACHE_SIZE)
+def cached_parallel_plan(n, dtype, threads):
+    return ParallelFFTPlan(n, dtype, threads)
+
+def get_parallel_plan(n, dtype=np.complex128, threads=None):
+    return cached_parallel_plan(n, complex_dtype_for(dtype), resolve_threads(threads))
+
+# Real-input plan whose n/2 complex transform is a ParallelFFTPlan
+@lru_cache(maxsize=PARALLEL_PLAN_CACHE_SIZE)
+def cached_parallel_rfft_plan(n, dtype, threads):
+    return RealFFTPlan(n, dtype, half_plan=get_parallel_plan(n // 2, dtype, threads))
+
+def get_parallel_rfft_plan(n, dtype=np.float64, threads=None):
+    return cached_parallel_rfft_plan(n, np.dtype(dtype), resolve_threads(threads))
@@ -0,0 +1,127 @@
+import numpy as np
+
+# Sub-bin refinement methods for interpolate_peaks
+INTERPOLATIONS = ('gaussian', 'parabolic', None)
+
+# Refine strict local maxima at integer bins (never the first or last bin) by fitting a
+# parabola through each peak and its two neighbours: 'parabolic' fits the magnitudes,
+# 'gaussian' fits their logarithms (exact for a Gaussian-shaped peak and within a
+# fraction of a Hz for Hann-windowed tones). Works on the last axis of 1-D or 2-D input.
+# Returns (fractional bin positions, interpolated amplitudes).
+def interpolate_peaks(spectrum, bins, method='gaussian'):
+    spectrum = np.asarray(spectrum)
+    bins = np.asarray(bins)
+    # (..., 3) neighbourhoods: left neighbour, peak, right neighbour
+    neighbours = bins[..., None] + np.array([-1, 0, 1])
+    if spectrum.ndim == 1:
+        values = spectrum[neighbours].astype(np.float64)
+    else:
+        values = spectrum[np.arange(len(bins))[:, None, None], neighbours].astype(np.float64)
+    if method is None:
+        return bins.astype(np.float64), values[..., 1]
+    if method == 'gaussian':
+        values = np.log(np.maximum(values, np.finfo(np.float64).tiny))
+    elif method != 'parabolic':
+        raise ValueError(f"Unknown interpolation {method!r}, expected one of {INTERPOLATIONS}")
+    a, b, c = values[..., 0], values[..., 1], values[..., 2]
+
+    # b > a and b >= c, so the curvature a - 2b + c is negative and the offset within ±1/2
+    offset = 0.5 * (a - c) / (a - 2 * b + c)
+    peak = b - 0.25 * (a - c) * offset
+    if method == 'gaussian':
+        peak = np.exp(peak)
+    return bins + offset, peak
+
+# Up to k strongest local maxima of a magnitude spectrum, strongest first.
+# Candidates are bins strictly above the left neighbour and not below the right one (and
+# above threshold) inside [lo, hi); argpartition keeps the selection O(N), and only the
+# few candidates that survive it are sorted. Peaks closer than min_distance bins to a
+# stronger one are suppressed. Returns (fractional bin positions, amplitudes); multiply
+# the positions by fs/n for Hz.
+def find_peaks(spectrum, k, min_distance=1, threshold=0.0, interpolation='gaussian', lo=0, hi=None):
+    spectrum = np.asarray(spectrum)
+    lo = max(lo, 1)
+    hi = len(spectrum) - 1 if hi is None else min(hi, len(spectrum) - 1)
+    if hi <= lo or k <= 0:
+        return np.empty(0), np.empty(0)
+
+    middle = spectrum[lo:hi]
+    candidates = np.flatnonzero((middle > spectrum[lo - 1:hi - 1]) & (middle >= spectrum[lo + 1:hi + 1]))
+    values = middle[candidates]
+    if threshold > 0:
+        keep = values > threshold
+        candidates, values = candidates[keep], values[keep]
+    if len(candidates) == 0:
+        return np.empty(0), np.empty(0)
+
+    selected = select_separated(candidates, values, k, min_distance)
+    positions, amps = interpolate_peaks(spectrum, selected + lo, interpolation)
+    # Interpolation can swap two nearly equal peaks; keep the refined amplitudes in order
+    order = np.argsort(amps)[::-1]
+    return positions[order], amps[order]
+
+# Pick the k strongest candidates that are at least min_distance bins apart
+def select_separated(candidates, values, k, min_distance):
+    shortlist = min(len(candidates), k if min_distance <= 1 else 4 * k)
+    while True:
+        if shortlist < len(candidates):
+            top = np.argpartition(values, -shortlist)[-shortlist:]
+        else:
+            top = np.arange(len(candidates))
+        ranked = candidates[top[np.argsort(values[top])[::-1]]]
+        if min_distance <= 1:
+            return ranked[:k]
+
+        # Greedy suppression over the shortlist; widened only if it runs dry
+        chosen = []
+        for position in ranked.tolist():
+            if all(abs(position - other) >= min_distance for other in chosen):
+                chosen.append(position)
+                if len(chosen) == k:
+                    break
+        if len(chosen) == k or shortlist == len(candidates):
+            return np.array(chosen, dtype=np.intp)
+        shortlist = min(len(candidates), 2 * shortlist)
+
+# Column indices of the k strongest finite entries of every row of `masked`, strongest
+# first, at least min_distance apart (the greedy rule of select_separated), with a mask of
+# the slots filled. One argmax per slot over all rows, after which the columns within
+# min_distance of each pick are set to -inf, so `masked` is overwritten.
+def select_separated_batch(masked, k, min_distance):
+    frames, width = masked.shape
+    rows = np.arange(frames)
+    around = np.arange(1 - min_distance, min_distance) if min_distance > 1 else np.zeros(1, dtype=np.intp)
+    top = np.empty((frames, k), dtype=np.intp)
+    valid = np.empty((frames, k), dtype=bool)
+    for slot in range(k):
+        best = np.argmax(masked, axis=-1)
+        top[:, slot] = best
+        valid[:, slot] = np.isfinite(masked[rows, best])
+        columns = best[:, None] + around
+        np.maximum(columns, 0, out=columns)
+        np.minimum(columns, width - 1, out=columns)
+        masked[rows[:, None], columns] = -np.inf
+    return top, valid
+
+# find_peaks on every row of a (frames x bins) magnitude spectrogram, with the same
+# local-maximum, threshold and min_distance rules.
+# Returns (positions, amplitudes), each (frames x k); rows with fewer than k peaks are padded
+# with nan positions and zero amplitudes.
+def find_peaks_batch(spectrogram, k, min_distance=1, threshold=0.0, interpolation='gaussian', lo=0, hi=None):
+    spectrogram = np.asarray(spectrogram, dtype=np.float64)
+    lo = max(lo, 1)
+    hi = spectrogram.shape[-1] - 1 if hi is None else min(hi, spectrogram.shape[-1] - 1)
+    middle = spectrogram[:, lo:hi]
+    k = min(k, middle.shape[-1])
+
+    peak = (middle > spectrogram[:, lo - 1:hi - 1]) & (middle >= spectrogram[:, lo + 1:hi + 1])
+    peak &= middle > threshold
+    masked = np.where(peak, middle, -np.inf)
+
+    top, valid = select_separated_batch(masked, k, min_distance)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        positions, amps = interpolate_peaks(spectrogram, top + lo, interpolation)
+    positions, amps = np.where(valid, positions, np.nan), np.where(valid, amps, 0.0)
+    order = np.argsort(amps, axis=-1)[:, ::-1]
+    return np.take_along_axis(positions, order, axis=-1), np.take_along_axis(amps, order, axis=-1)
@@ -0,0 +1,210 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+from .kernels import (
+    KERNELS,
+    bit_reverse_indices,
+    butterfly_stages,
+    digit_reverse_indices,
+    is_power_of_two,
+    radix4_factors,
+    radix4_stages,
+    radix4_tables,
+    split_radix_stages,
+    split_radix_tables,
+    twiddle_factors,
+)
+
+# Radix-4 only pays for its extra NumPy calls per stage on large transforms
+# (see `python benchmark.py --filter plan-radix`); below this size radix-2 is faster
+RADIX4_MIN_SIZE = 2**20
+
+# Butterfly kernel used by power-of-two plans of size n unless one is requested explicitly
+def default_kernel(n):
+    return 'radix4' if n >= RADIX4_MIN_SIZE else 'radix2'
+
+# Default byte budget for the module-level plan cache
+DEFAULT_PLAN_CACHE_BYTES = 64 * 1024 * 1024
+
+PlanCacheInfo = namedtuple('PlanCacheInfo', ['hits', 'misses', 'evictions', 'plans', 'nbytes', 'max_bytes'])
+
+# Map any input dtype to the complex dtype the transform runs in
+def complex_dtype_for(dtype):
+    return np.result_type(dtype, np.complex64)
+
+# Copy signal into the head of buffer and zero the tail
+def pad_into(buffer, signal):
+    N = len(signal)
+    if N > len(buffer):
+        raise ValueError(f"Signal of length {N} does not fit a plan of size {len(buffer)}")
+    buffer[:N] = signal
+    buffer[N:] = 0
+    return buffer
+
+# Precomputed state for transforms of one size: twiddles, permutation and scratch buffers.
+# kernel selects the butterfly schedule: 'radix2', 'radix4' (radix-4 stages plus one
+# radix-2 stage for odd log2(n)) or 'split' (split-radix L-shaped butterflies)
+class FFTPlan:
+    def __init__(self, n, dtype=np.complex128, kernel=None):
+        if not is_power_of_two(n):
+            raise ValueError("Size of x must be a power of 2")
+        kernel = kernel or default_kernel(n)
+        if kernel not in KERNELS:
+            raise ValueError(f"Unknown FFT kernel {kernel!r}; expected one of {KERNELS}")
+        self.n = n
+        self.kernel = kernel
+        self.dtype = complex_dtype_for(dtype)
+        self.real_dtype = np.empty(0, self.dtype).real.dtype
+
+        self.twiddles = None
+        self.stages = None
+        self.pairs = None
+        if kernel == 'radix2':
+            self.permutation = bit_reverse_indices(n)
+            self.twiddles = twiddle_factors(n, self.dtype)
+            scratch_shape = (max(n // 2, 1),)
+        elif kernel == 'radix4':
+            self.permutation = digit_reverse_indices(n, radix4_factors(n))
+            self.stages = radix4_tables(n, self.dtype)
+            scratch_shape = (4, max(n // 2, 1))
+        else:
+            # Split-radix is decimation in frequency: the bit reversal is applied to the output
+            self.permutation = bit_reverse_indices(n)
+            self.stages, self.pairs = split_radix_tables(n, self.dtype)
+            scratch_shape = (n,)
+
+        # Reused on every call; results returned by execute() are overwritten by the next call
+        self.buffer = np.empty(n, dtype=self.dtype)
+        self.scratch = np.empty(scratch_shape, dtype=self.dtype)
+        self.padded = np.zeros(n, dtype=self.real_dtype)
+
+    @property
+    def nbytes(self):
+        total = self.permutation.nbytes + self.buffer.nbytes + self.scratch.nbytes + self.padded.nbytes
+        if self.twiddles is not None:
+            total += self.twiddles.nbytes
+        if self.kernel == 'radix4':
+            total += sum(t.nbytes for _, _, t in self.stages if t is not None)
+        elif self.kernel == 'split':
+            total += self.pairs.nbytes
+            total += sum(first.nbytes + w1.nbytes + w3.nbytes for first, _, w1, w3 in self.stages)
+        return total
+
+    # Copy the signal into the plan's zero-padded buffer (no allocation per frame)
+    def pad(self, signal):
+        return pad_into(self.padded, signal)
+
+    # Bit-reversal permutation of x (along its last axis) into out
+    def permute(self, x, out):
+        if x.dtype == out.dtype:
+            np.take(x, self.permutation, axis=-1, out=out, mode='wrap')
+        elif x.dtype == self.real_dtype:
+            np.take(x, self.permutation, axis=-1, out=out.real, mode='wrap')
+            out.imag[...] = 0
+        else:
+            out[...] = x[..., self.permutation]
+        return out
+
+    def run(self, x, out, scratch):
+        if self.kernel == 'radix2':
+            self.permute(x, out)
+            return butterfly_stages(out, self.twiddles, scratch)
+        if self.kernel == 'radix4':
+            self.permute(x, out)
+            return radix4_stages(out, self.stages, scratch)
+        work = scratch.reshape(out.shape)
+        work[...] = x
+        split_radix_stages(work, self.stages, self.pairs)
+        np.take(work, self.permutation, axis=-1, out=out, mode='wrap')
+        return out
+
+    # Forward transform of x; writes into out, or into the plan's own buffer if out is None
+    def execute(self, x, out=None):
+        x = np.asarray(x)
+        if len(x) != self.n:
+            raise ValueError(f"Input of length {len(x)} does not match a plan of size {self.n}")
+        if out is None:
+            out = self.buffer
+        return self.run(x, out, self.scratch)
+
+    # Transform every row of a (frames x n) array in one vectorized butterfly pass
+    def execute_batch(self, x, out=None):
+        x = np.asarray(x)
+        if x.shape[-1] != self.n:
+            raise ValueError(f"Rows of length {x.shape[-1]} do not match a plan of size {self.n}")
+        if out is None:
+            out = np.empty(x.shape, dtype=self.dtype)
+        frames = out.size // self.n
+        scratch = np.empty(self.scratch.shape[:-1] + (self.scratch.shape[-1] * frames,), dtype=self.dtype)
+        return self.run(x, out, scratch)
+
+    def __repr__(self):
+        return f"FFTPlan(n={self.n}, dtype={self.dtype}, kernel={self.kernel!r})"
+
+# Module-level plan cache, LRU-evicted by total size in bytes
+class PlanCache:
+    def __init__(self, max_bytes=DEFAULT_PLAN_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.plans = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, n, dtype=np.complex128, factory=FFTPlan):
+        key = (factory, n, complex_dtype_for(dtype))
+        with self.lock:
+            plan = self.plans.get(key)
+            if plan is not None:
+                self.hits += 1
+                self.plans.move_to_end(key)
+                return plan
+            self.misses += 1
+
+        plan = factory(n, dtype)
+        with self.lock:
+            if key not in self.plans:
+                self.plans[key] = plan
+                self.nbytes += plan.nbytes
+                self.evict(keep=key)
+            return self.plans[key]
+
+    # Drop least recently used plans until the cache fits its budget (never the one just added)
+    def evict(self, keep=None):
+        while self.nbytes > self.max_bytes and len(self.plans) > 1:
+            key = next(iter(self.plans))
+            if key == keep:
+                break
+            plan = self.plans.pop(key)
+            self.nbytes -= plan.nbytes
+            self.evictions += 1
+
+    def resize(self, max_bytes):
+        with self.lock:
+            self.max_bytes = max_bytes
+            self.evict()
+
+    def clear(self):
+        with self.lock:
+            self.plans.clear()
+            self.nbytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def info(self):
+        with self.lock:
+            return PlanCacheInfo(self.hits, self.misses, self.evictions,
+                                 len(self.plans), self.nbytes, self.max_bytes)
+
+plan_cache = PlanCache()
+
+def plan_cache_info():
+    return plan_cache.info()
+
+def set_plan_cache_limit(max_bytes):
+    plan_cache.resize(max_bytes)
+
+def clear_plan_cache():
+    plan_cache.clear()
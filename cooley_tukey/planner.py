@@ -0,0 +1,30 @@
+import numpy as np
+
+from .kernels import is_power_of_two
+from .mixed import BluesteinPlan, MixedRadixPlan, bluestein_cost, mixed_radix_cost
+from .plan import FFTPlan, plan_cache
+
+STRATEGIES = {
+    'radix2': FFTPlan,
+    'mixed': MixedRadixPlan,
+    'bluestein': BluesteinPlan,
+}
+
+# Pick the cheapest engine for size n: radix-2 for powers of two, otherwise
+# mixed-radix for smooth sizes and Bluestein when large prime factors dominate
+def choose_strategy(n):
+    if is_power_of_two(n):
+        return 'radix2'
+    if mixed_radix_cost(n) <= bluestein_cost(n):
+        return 'mixed'
+    return 'bluestein'
+
+# Build an uncached plan for any size n with the strategy the planner picks
+def make_plan(n, dtype=np.complex128):
+    if n < 1:
+        raise ValueError("FFT size must be at least 1")
+    return STRATEGIES[choose_strategy(n)](n, dtype)
+
+# Fetch (or build and cache) the plan for size n
+def get_plan(n, dtype=np.complex128):
+    return plan_cache.get(n, dtype, factory=make_plan)
@@ -0,0 +1,173 @@
+import numpy as np
+
+from .plan import complex_dtype_for, pad_into, plan_cache
+from .planner import get_plan, make_plan
+
+# Real-input FFT of size n: the n real samples are packed as n/2 complex values
+# z[k] = x[2k] + 1j*x[2k+1], transformed with an n/2 complex FFT and then
+# split back into the n/2+1 non-redundant bins with one twiddle pass.
+# half_plan may supply the n/2 complex plan (e.g. a ParallelFFTPlan).
+class RealFFTPlan:
+    def __init__(self, n, dtype=np.float64, half_plan=None):
+        if n < 2 or n % 2 != 0:
+            raise ValueError("Real-input FFT size must be even")
+        self.n = n
+        self.dtype = complex_dtype_for(dtype)
+        self.real_dtype = np.empty(0, self.dtype).real.dtype
+        M = n // 2
+
+        # Own half-size complex plan, so its buffers are not shared with other callers
+        self.half_plan = half_plan or make_plan(M, self.dtype)
+
+        # Z[k] and Z[M-k] gather tables for k = 0..M (Z[M] wraps to Z[0])
+        k = np.arange(M + 1)
+        self.forward_index = k % M
+        self.mirror_index = (M - k) % M
+        # Post-processing twiddles: forward -0.5j*W^k, inverse +0.5j*W^-k
+        w = np.exp(-2j * np.pi * k / n)
+        self.forward_twiddles = (-0.5j * w).astype(self.dtype)
+        self.inverse_twiddles = (0.5j * np.conj(w[:M])).astype(self.dtype)
+
+        self.packed = np.empty(M, dtype=self.dtype)
+        self.spectrum = np.empty(M + 1, dtype=self.dtype)
+        self.mirror = np.empty(M + 1, dtype=self.dtype)
+        self.work = np.empty(M + 1, dtype=self.dtype)
+        self.signal = np.empty(M, dtype=self.dtype)
+        self.padded = np.zeros(n, dtype=self.real_dtype)
+
+    @property
+    def nbytes(self):
+        arrays = (self.forward_index, self.mirror_index, self.forward_twiddles,
+                  self.inverse_twiddles, self.packed, self.spectrum, self.mirror,
+                  self.work, self.signal, self.padded)
+        return self.half_plan.nbytes + sum(a.nbytes for a in arrays)
+
+    def pad(self, signal):
+        return pad_into(self.padded, signal)
+
+    # Pack even/odd samples as real/imaginary parts (a zero-copy view when possible)
+    def pack(self, x):
+        if x.dtype == self.real_dtype and x.flags.c_contiguous:
+            return x.view(self.dtype)
+        self.packed.real[:] = x[0::2]
+        self.packed.imag[:] = x[1::2]
+        return self.packed
+
+    # Forward transform: returns the n/2+1 bins np.fft.rfft would (in the plan's buffer)
+    def execute(self, x):
+        x = np.asarray(x)
+        if len(x) != self.n:
+            raise ValueError(f"Input of length {len(x)} does not match a plan of size {self.n}")
+        Z = self.half_plan.execute(self.pack(x))
+
+        # X[k] = (Z[k] + conj(Z[M-k]))/2 - 0.5j*W^k*(Z[k] - conj(Z[M-k]))
+        a, b = self.spectrum, self.mirror
+        np.take(Z, self.forward_index, out=a)
+        np.take(Z, self.mirror_index, out=b)
+        np.conjugate(b, out=b)
+        np.add(a, b, out=self.work)
+        self.work *= 0.5
+        np.subtract(a, b, out=a)
+        np.multiply(a, self.forward_twiddles, out=a)
+        a += self.work
+        return a
+
+    # Forward transform of every row of a (frames x n) real array -> (frames x n/2+1)
+    def execute_batch(self, x):
+        x = np.asarray(x)
+        if x.shape[-1] != self.n:
+            raise ValueError(f"Rows of length {x.shape[-1]} do not match a plan of size {self.n}")
+        if x.dtype == self.real_dtype and x.flags.c_contiguous:
+            packed = x.view(self.dtype)
+        else:
+            packed = np.empty(x.shape[:-1] + (self.n // 2,), dtype=self.dtype)
+            packed.real[...] = x[..., 0::2]
+            packed.imag[...] = x[..., 1::2]
+        Z = self.half_plan.execute_batch(packed)
+
+        a = np.take(Z, self.forward_index, axis=-1)
+        b = np.take(Z, self.mirror_index, axis=-1)
+        np.conjugate(b, out=b)
+        half_sum = a + b
+        half_sum *= 0.5
+        np.subtract(a, b, out=a)
+        a *= self.forward_twiddles
+        a += half_sum
+        return a
+
+    # Inverse transform of n/2+1 bins back to n real samples (in the plan's buffer)
+    def inverse(self, X):
+        X = np.asarray(X)
+        M = self.n // 2
+        if len(X) != M + 1:
+            raise ValueError(f"Spectrum of length {len(X)} does not match a plan of size {self.n}")
+
+        # Z[k] = (X[k] + conj(X[M-k]))/2 + 0.5j*W^-k*(X[k] - conj(X[M-k])) for k < M
+        a = self.spectrum[:M]
+        b = self.mirror[:M]
+        a[:] = X[:M]
+        b[:] = X[M:0:-1]
+        np.conjugate(b, out=b)
+        Z = self.packed
+        np.add(a, b, out=Z)
+        Z *= 0.5
+        np.subtract(a, b, out=a)
+        np.multiply(a, self.inverse_twiddles, out=a)
+        Z += a
+
+        # ifft(Z) = conj(fft(conj(Z))) / M; the interleaved result is the real signal
+        np.conjugate(Z, out=Z)
+        z = self.half_plan.execute(Z, out=self.signal)
+        np.conjugate(z, out=z)
+        z /= M
+        return z.view(self.real_dtype)
+
+    # Inverse transform of every row of a (frames x n/2+1) spectrum -> (frames x n) real rows
+    def inverse_batch(self, X):
+        X = np.asarray(X)
+        M = self.n // 2
+        if X.shape[-1] != M + 1:
+            raise ValueError(f"Spectra of length {X.shape[-1]} do not match a plan of size {self.n}")
+        a = X[..., :M].astype(self.dtype)
+        b = np.conjugate(X[..., M:0:-1])
+        Z = a + b
+        Z *= 0.5
+        np.subtract(a, b, out=a)
+        a *= self.inverse_twiddles
+        Z += a
+
+        np.conjugate(Z, out=Z)
+        z = self.half_plan.execute_batch(Z)
+        np.conjugate(z, out=z)
+        z /= M
+        return z.view(self.real_dtype)
+
+    def __repr__(self):
+        return f"RealFFTPlan(n={self.n}, dtype={self.real_dtype})"
+
+# Fetch (or build and cache) the real-input plan for size n
+def get_rfft_plan(n, dtype=np.float64):
+    return plan_cache.get(n, dtype, factory=RealFFTPlan)
+
+# Custom real-input FFT: the n//2+1 non-redundant bins (same output as np.fft.rfft)
+def rfft(x):
+    x = np.asarray(x)
+    N = len(x)
+    if N % 2 != 0:
+        # Odd sizes cannot be packed into N/2 complex values; use the full complex transform
+        return get_plan(N, np.complex128).execute(x)[:N // 2 + 1].copy()
+    return get_rfft_plan(N, np.float64).execute(x).copy()
+
+# Inverse of rfft (same output as np.fft.irfft); n defaults to 2*(len(X)-1)
+def irfft(X, n=None):
+    X = np.asarray(X)
+    if n is None:
+        n = 2 * (len(X) - 1)
+    if len(X) != n // 2 + 1:
+        raise ValueError(f"Spectrum of length {len(X)} does not match n={n}")
+    if n % 2 != 0:
+        # Odd sizes: rebuild the Hermitian spectrum and use the full complex transform
+        # (conjugated input and output give the inverse)
+        full = np.concatenate([X, np.conj(X[1:][::-1])])
+        return get_plan(n, np.complex128).execute(np.conj(full)).real / n
+    return get_rfft_plan(n, np.float64).inverse(X).copy()
@@ -0,0 +1,147 @@
+import time
+
+import numpy as np
+
+# Default redraw rate of the live plots; analysis runs as fast as frames arrive regardless
+DEFAULT_RENDER_FPS = 30
+
+# Bar chart + top-peaks table that is built once and then updated in place.
+# The bars and the table texts are animated artists: a redraw restores the cached
+# background and blits only those artists, instead of clearing and rebuilding the axes.
+# update() only stores the newest data; draw_if_due() renders it at most fps times a
+# second, so a slow GUI never holds up the analysis loop.
+class SpectrumRenderer:
+    def __init__(self, ax, ax_table, x, width=None, xlim=None, ylim=(0, 1), title='',
+                 col_labels=("Frequency", "Amplitude", "% of Max"), rows=4,
+                 autoscale=False, fps=DEFAULT_RENDER_FPS, align='center', xscale='linear'):
+        self.ax = ax
+        self.fig = ax.figure
+        self.canvas = self.fig.canvas
+        self.autoscale = autoscale
+        self.interval = 1.0 / fps
+        self.last_draw = 0.0
+        self.heights = None
+        self.table_data = None
+        self.pending = False
+        self.use_blit = getattr(self.canvas, 'supports_blit', False)
+        self.background = None
+
+        x = np.asarray(x)
+        if width is None:
+            width = x[1] - x[0]
+        self.bars = ax.bar(x, np.zeros(len(x)), width=width, align=align, animated=self.use_blit)
+        self.bar_patches = list(self.bars)
+        ax.set_xscale(xscale)
+        if xlim is not None:
+            ax.set_xlim(*xlim)
+        ax.set_ylim(*ylim)
+        ax.set_xlabel('Frequency (Hz)')
+        ax.set_ylabel('Amplitude')
+        ax.set_title(title)
+
+        # Empty cells are drawn into the background; only their texts are animated
+        ax_table.axis('tight')
+        ax_table.axis('off')
+        table = ax_table.table(cellText=[[''] * len(col_labels)] * rows, colLabels=list(col_labels), loc='center')
+        table.auto_set_font_size(False)
+        table.set_fontsize(10)
+        table.scale(1, 1.5)  # Adjust table size
+        self.texts = [[table[row + 1, col].get_text() for col in range(len(col_labels))] for row in range(rows)]
+        for text in self.animated_texts():
+            text.set_animated(self.use_blit)
+
+        self.canvas.mpl_connect('resize_event', self.invalidate)
+        self.refresh_background()
+
+    def animated_texts(self):
+        return [text for row in self.texts for text in row]
+
+    def invalidate(self, event=None):
+        self.background = None
+
+    # Full redraw of the static parts (axes, ticks, labels, cell borders) and a new cached background
+    def refresh_background(self):
+        if not self.use_blit:
+            self.canvas.draw()
+            return
+        saved = [text.get_text() for text in self.animated_texts()]
+        for text in self.animated_texts():
+            text.set_text('')
+        self.canvas.draw()
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        for text, value in zip(self.animated_texts(), saved):
+            text.set_text(value)
+
+    # Store the newest bar heights and table rows (lists of strings); nothing is drawn here
+    def update(self, heights, table_data):
+        self.heights = heights
+        self.table_data = table_data
+        self.pending = True
+
+    # Render the stored data now
+    def draw(self):
+        if self.heights is not None:
+            for bar, height in zip(self.bar_patches, self.heights):
+                bar.set_height(height)
+            if self.autoscale:
+                self.rescale(np.max(self.heights))
+        if self.table_data is not None:
+            # Rows beyond the data (e.g. fewer peaks than rows) are blanked
+            for index, row in enumerate(self.texts):
+                values = self.table_data[index] if index < len(self.table_data) else [''] * len(row)
+                for text, value in zip(row, values):
+                    text.set_text(value)
+
+        if not self.use_blit:
+            self.canvas.draw_idle()
+        else:
+            if self.background is None:
+                self.refresh_background()
+            self.canvas.restore_region(self.background)
+            for bar in self.bar_patches:
+                self.ax.draw_artist(bar)
+            for text in self.animated_texts():
+                self.fig.draw_artist(text)
+            self.canvas.blit(self.fig.bbox)
+        self.canvas.flush_events()
+        self.pending = False
+        self.last_draw = time.perf_counter()
+
+    # Keep the y-axis at about 1.1x the peak; the limits (and so the background)
+    # only change when the peak leaves the 0.5x..1x band of the current top
+    def rescale(self, peak):
+        top = self.ax.get_ylim()[1]
+        if peak > 0 and (peak > top or peak < 0.5 * top):
+            self.ax.set_ylim(0, peak * 1.1)
+            self.invalidate()
+
+    # Whether the last redraw is at least one frame interval old; lets callers skip
+    # preparing data for frames that would not be shown
+    def due(self):
+        return time.perf_counter() - self.last_draw >= self.interval
+
+    # Draw if new data is waiting and a redraw is due
+    def draw_if_due(self):
+        if self.pending and self.due():
+            self.draw()
+            return True
+        return False
+
+    # Keep the window responsive while waiting for data (replaces plt.pause, which redraws everything)
+    def idle(self, seconds):
+        self.canvas.flush_events()
+        time.sleep(seconds)
+
+# Figure with the spectrum and table axes plus its renderer; matplotlib is only imported
+# here, so headless runs never pay for it
+def create_spectrum_plot(x, figsize=(12, 8), **options):
+    import matplotlib.pyplot as plt
+    plt.ion()  # Turn on interactive mode
+    fig, (ax, ax_table) = plt.subplots(2, 1, figsize=figsize, gridspec_kw={'height_ratios': [3, 1]})
+    return SpectrumRenderer(ax, ax_table, x, **options)
+
+# Leave the last frame on screen until the window is closed
+def show_final_plot():
+    import matplotlib.pyplot as plt
+    plt.ioff()
+    plt.show()
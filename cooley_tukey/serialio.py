@@ -0,0 +1,226 @@
+import binascii
+import queue
+import struct
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+# 12-bit ADC full scale and the voltage it maps to
+ADC_MAX_VALUE = 4095
+ADC_MAX_VOLTAGE = 5.0
+
+# Blocks the reader thread may queue before the oldest are dropped
+DEFAULT_QUEUE_BLOCKS = 8
+
+SerialStats = namedtuple('SerialStats', ['blocks', 'dropped', 'short_reads', 'bytes'])
+
+# Framed sample protocol: sync word, little-endian uint16 sample count, count little-endian
+# int16 samples, then a little-endian CRC-16/CCITT of the count and sample bytes
+FRAME_SYNC = b'\xa5\x5a'
+FRAME_HEADER = struct.Struct('<2sH')
+FRAME_CRC = struct.Struct('<H')
+MAX_FRAME_SAMPLES = 4096
+
+# Bytes requested per serial read by the framed reader; read() returns early on timeout
+DEFAULT_READ_SIZE = 4096
+
+FrameStats = namedtuple('FrameStats', ['frames', 'samples', 'bytes', 'crc_errors', 'bad_headers',
+                                       'skipped_bytes', 'overruns', 'dropped', 'bytes_per_second',
+                                       'samples_per_second'])
+
+# Map ADC counts (0-4095) to volts (0-5 V); works on whole arrays at once
+def adc_to_voltage(counts, max_adc_value=ADC_MAX_VALUE, max_voltage=ADC_MAX_VOLTAGE, out=None):
+    return np.multiply(counts, max_voltage / max_adc_value, out=out, dtype=np.float64, casting='unsafe')
+
+# Background reader for a serial port streaming big-endian uint16 ADC samples.
+# Each block is pulled with one read(2 * block_size) and decoded with one frombuffer,
+# so there is no per-sample Python work. Decoded blocks go into a bounded queue;
+# when the consumer falls behind the oldest block is dropped (and counted) rather
+# than letting the OS serial buffer overflow.
+class SerialBlockReader:
+    def __init__(self, ser, block_size, max_blocks=DEFAULT_QUEUE_BLOCKS, convert=adc_to_voltage):
+        self.ser = ser
+        self.block_size = block_size
+        self.convert = convert
+        self.queue = queue.Queue(maxsize=max_blocks)
+        self.pending = bytearray()  # Bytes of a block that arrived over several reads
+        self.running = False
+        self.thread = None
+        self.blocks = 0
+        self.dropped = 0
+        self.short_reads = 0  # Reads that timed out before a full block arrived
+        self.bytes = 0
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name='SerialBlockReader', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+
+    # Next complete block of raw bytes; partial reads (timeouts) are carried over
+    def read_block(self):
+        nbytes = 2 * self.block_size
+        while self.running:
+            data = self.ser.read(nbytes - len(self.pending))
+            self.bytes += len(data)
+            if not self.pending and len(data) == nbytes:
+                return data
+            if len(data) < nbytes - len(self.pending):
+                self.short_reads += 1
+            self.pending += data
+            if len(self.pending) == nbytes:
+                block = bytes(self.pending)
+                self.pending.clear()
+                return block
+        return None
+
+    def decode(self, data):
+        counts = np.frombuffer(data, dtype='>u2')
+        return counts if self.convert is None else self.convert(counts)
+
+    def put(self, block):
+        while True:
+            try:
+                self.queue.put_nowait(block)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def run(self):
+        while self.running:
+            data = self.read_block()
+            if data is None:
+                break
+            self.put(self.decode(data))
+            self.blocks += 1
+
+    # Consumer: next decoded block, or None if nothing arrives within timeout seconds
+    def get(self, timeout=None):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def stats(self):
+        return SerialStats(self.blocks, self.dropped, self.short_reads, self.bytes)
+
+def frame_crc(data):
+    return binascii.crc_hqx(data, 0xFFFF)
+
+# Build one frame of the framed protocol from int16 samples (the device side; also used by the simulator)
+def encode_frame(samples):
+    samples = np.asarray(samples, dtype='<i2')
+    body = struct.pack('<H', len(samples)) + samples.tobytes()
+    return FRAME_SYNC + body + FRAME_CRC.pack(frame_crc(body))
+
+# Incremental decoder for the framed protocol. Bytes may arrive in any split; complete
+# frames come out as int16 arrays. On a bad length or CRC the decoder drops the first
+# sync byte and searches for the next sync word, so it re-locks after any corruption.
+class FrameDecoder:
+    def __init__(self, max_samples=MAX_FRAME_SAMPLES):
+        self.max_samples = max_samples
+        self.buffer = bytearray()
+        self.frames = 0
+        self.samples = 0
+        self.crc_errors = 0
+        self.bad_headers = 0
+        self.skipped_bytes = 0  # Bytes discarded while searching for a sync word
+
+    # Append received bytes and return the sample arrays of every frame completed by them
+    def feed(self, data):
+        buffer = self.buffer
+        buffer += data
+        decoded = []
+        start = 0
+        while True:
+            sync = buffer.find(FRAME_SYNC, start)
+            if sync < 0:
+                # Keep a trailing unconsumed byte that may be the first half of the next sync word
+                keep = 1 if start < len(buffer) and buffer[-1:] == FRAME_SYNC[:1] else 0
+                self.skipped_bytes += len(buffer) - start - keep
+                start = len(buffer) - keep
+                break
+            self.skipped_bytes += sync - start
+            start = sync
+            if len(buffer) - start < FRAME_HEADER.size:
+                break
+            _, count = FRAME_HEADER.unpack_from(buffer, start)
+            if count == 0 or count > self.max_samples:
+                self.bad_headers += 1
+                self.skipped_bytes += 1
+                start += 1
+                continue
+            end = start + FRAME_HEADER.size + 2 * count + FRAME_CRC.size
+            if len(buffer) < end:
+                break
+            body = bytes(buffer[start + len(FRAME_SYNC):end - FRAME_CRC.size])
+            if FRAME_CRC.unpack_from(buffer, end - FRAME_CRC.size)[0] != frame_crc(body):
+                self.crc_errors += 1
+                self.skipped_bytes += 1
+                start += 1
+                continue
+            decoded.append(np.frombuffer(body, dtype='<i2', offset=2))
+            self.frames += 1
+            self.samples += count
+            start = end
+        del buffer[:start]
+        return decoded
+
+# Background producer: reads the serial port in large chunks, decodes frames and writes
+# the samples (scaled to [-1, 1)) into a RingBuffer, e.g. for an STFTEngine to consume;
+# a FIRFilter as fir pre-filters the samples frame by frame on the reader thread
+class SerialFrameReader:
+    def __init__(self, ser, ring, read_size=DEFAULT_READ_SIZE, max_samples=MAX_FRAME_SAMPLES, fir=None):
+        self.ser = ser
+        self.ring = ring
+        self.fir = fir
+        self.read_size = read_size
+        self.decoder = FrameDecoder(max_samples)
+        self.running = False
+        self.thread = None
+        self.bytes = 0
+        self.started = None
+
+    def start(self):
+        self.running = True
+        self.started = time.perf_counter()
+        self.thread = threading.Thread(target=self.run, name='SerialFrameReader', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+
+    def run(self):
+        scale = np.float32(1 / 32768)
+        while self.running:
+            # Take whatever has arrived (at least one byte, waiting up to the port timeout)
+            waiting = getattr(self.ser, 'in_waiting', self.read_size)
+            data = self.ser.read(min(max(waiting, 1), self.read_size))
+            if not data:
+                continue
+            self.bytes += len(data)
+            for samples in self.decoder.feed(data):
+                samples = samples * scale
+                self.ring.write(samples if self.fir is None else self.fir.process(samples))
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.started if self.started else 0.0
+        scale = 1 / elapsed if elapsed > 0 else 0.0
+        decoder = self.decoder
+        return FrameStats(decoder.frames, decoder.samples, self.bytes, decoder.crc_errors,
+                          decoder.bad_headers, decoder.skipped_bytes, self.ring.overruns,
+                          self.ring.dropped, self.bytes * scale, decoder.samples * scale)
@@ -0,0 +1,173 @@
+from collections import namedtuple
+from time import perf_counter
+
+import numpy as np
+
+StreamStats = namedtuple('StreamStats', ['frames', 'skipped', 'underruns', 'overruns', 'dropped', 'status_flags'])
+
+# Single-producer/single-consumer ring buffer for audio samples.
+# The producer (audio callback) only moves write_index and the consumer only moves
+# read_index, so no lock is needed: the producer copies the samples in first and
+# publishes them by bumping write_index afterwards. Nothing is allocated per write.
+# With channels > 1 every slot holds one sample per channel: writes take (frames x channels)
+# blocks and indices and counts are in frames.
+class RingBuffer:
+    def __init__(self, capacity, dtype=np.float32, channels=1):
+        self.capacity = capacity
+        self.channels = channels
+        self.data = np.zeros(capacity if channels == 1 else (capacity, channels), dtype=dtype)
+        self.write_index = 0   # Total samples written (producer side)
+        self.read_index = 0    # Total samples consumed (consumer side)
+        self.overruns = 0      # Writes that did not fit and lost samples
+        self.dropped = 0       # Samples lost to overruns
+        self.status_flags = 0  # Callbacks that reported a non-empty sounddevice status
+
+    def available(self):
+        return self.write_index - self.read_index
+
+    def free(self):
+        return self.capacity - self.available()
+
+    # Producer: append samples; when the buffer is full the newest samples are dropped
+    def write(self, samples):
+        n = len(samples)
+        free = self.free()
+        if n > free:
+            self.overruns += 1
+            self.dropped += n - free
+            n = free
+        start = self.write_index % self.capacity
+        first = min(n, self.capacity - start)
+        self.data[start:start + first] = samples[:first]
+        self.data[:n - first] = samples[first:n]
+        self.write_index += n
+
+    # Consumer: copy len(out) samples from the read position without consuming them
+    def peek(self, out):
+        n = len(out)
+        start = self.read_index % self.capacity
+        first = min(n, self.capacity - start)
+        out[:first] = self.data[start:start + first]
+        out[first:] = self.data[:n - first]
+        return out
+
+    # Consumer: release n samples
+    def advance(self, n):
+        self.read_index += n
+
+    def read(self, out):
+        self.peek(out)
+        self.advance(len(out))
+        return out
+
+# sounddevice callback that appends one input channel (or, with channel=None, every
+# channel into a multi-channel ring) to the ring buffer.
+# A FIRFilter (cooley_tukey.fir) as fir pre-filters the channel in the callback, keeping
+# its block state from one callback to the next; it needs a single channel.
+# With a profiler, the callback's own duration is recorded as the 'capture' stage and
+# the status flags and ring overruns (blocks that did not fit) are counted.
+def ring_callback(ring, channel=0, profiler=None, fir=None):
+    if fir is not None and channel is None:
+        raise ValueError("A FIR pre-filter needs a single input channel")
+
+    def audio_callback(indata, frames, time, status):
+        if status:
+            ring.status_flags += 1
+        if fir is not None:
+            ring.write(fir.process(indata[:, channel]))
+        else:
+            ring.write(indata if channel is None else indata[:, channel])
+
+    if profiler is None or not profiler.enabled:
+        return audio_callback
+
+    def profiled_callback(indata, frames, time, status):
+        start = perf_counter()
+        overruns = ring.overruns
+        audio_callback(indata, frames, time, status)
+        if status:
+            profiler.count_status(status)
+        if ring.overruns != overruns:
+            profiler.count('ring_overrun')
+        profiler.record('capture', perf_counter() - start)
+    return profiled_callback
+
+# Short-time Fourier framing on top of a ring buffer: frames of n_fft samples every
+# hop samples (e.g. 2048/512 for 75% overlap), windowed into one reused buffer.
+# Every frame is handed out exactly once. On a multi-channel ring each frame is a
+# (channels x n_fft) array, transposed and windowed in one pass, ready for execute_batch.
+# An underrun is a missed hop deadline: a frame the consumer only reaches (or skips) after
+# the capture position has moved a further hop past it. Polls that find nothing new are
+# not underruns.
+class STFTEngine:
+    def __init__(self, ring, n_fft, hop, window=None, dtype=None):
+        if hop < 1 or hop > n_fft:
+            raise ValueError("hop must be between 1 and n_fft")
+        if ring.capacity < n_fft + hop:
+            raise ValueError("Ring buffer must hold at least n_fft + hop samples")
+        self.ring = ring
+        self.n_fft = n_fft
+        self.hop = hop
+        self.window = window
+        if ring.channels == 1:
+            self.frame = np.zeros(n_fft, dtype=dtype or ring.data.dtype)
+            self.samples = self.frame
+        else:
+            self.frame = np.zeros((ring.channels, n_fft), dtype=dtype or ring.data.dtype)
+            self.samples = np.zeros((n_fft, ring.channels), dtype=ring.data.dtype)
+        self.frames_out = 0
+        self.skipped = 0
+        self.underruns = 0
+        self.checked = 0  # Stream position up to which frames were checked for lateness
+
+    def ready(self):
+        return self.ring.available() >= self.n_fft
+
+    # Count the frames that became overdue since the last poll, once each
+    def count_late(self):
+        start = max(self.ring.read_index, self.checked)
+        last = self.ring.write_index - self.n_fft - self.hop  # Newest frame start a hop overdue
+        if last >= start:
+            late = (last - start) // self.hop + 1
+            self.underruns += late
+            self.checked = start + late * self.hop
+
+    def take_frame(self):
+        self.ring.peek(self.samples)
+        self.ring.advance(self.hop)
+        samples = self.samples if self.ring.channels == 1 else self.samples.T
+        if self.window is not None:
+            np.multiply(samples, self.window, out=self.frame)
+        elif samples is not self.frame:
+            self.frame[...] = samples
+        self.frames_out += 1
+        return self.frame
+
+    # Next frame in order, or None if not enough audio has arrived
+    def next_frame(self):
+        self.count_late()
+        if not self.ready():
+            return None
+        return self.take_frame()
+
+    # Every complete frame currently buffered, in order (the yielded buffer is reused)
+    def frames(self):
+        self.count_late()
+        while self.ready():
+            yield self.take_frame()
+
+    # Newest complete frame, skipping older ones; for display loops that cannot keep up
+    def latest_frame(self):
+        self.count_late()
+        available = self.ring.available()
+        if available < self.n_fft:
+            return None
+        behind = (available - self.n_fft) // self.hop
+        if behind:
+            self.ring.advance(behind * self.hop)
+            self.skipped += behind
+        return self.take_frame()
+
+    def stats(self):
+        return StreamStats(self.frames_out, self.skipped, self.underruns,
+                           self.ring.overruns, self.ring.dropped, self.ring.status_flags)
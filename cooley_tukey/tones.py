@@ -0,0 +1,159 @@
+import math
+from collections import namedtuple
+
+import numpy as np
+
+# Blocks between exact recomputations of the sliding sums, so rounding errors cannot build up
+DEFAULT_RESYNC_BLOCKS = 64
+
+# Margin (amplitude ratio) by which a band's peak must beat the noise floor to match
+DEFAULT_MARGIN = 3.0
+
+# Mean |Hann-windowed bin|^2 over mean |bin|^2 for white noise: 0.5^2 + 2 * 0.25^2
+HANN_POWER = 0.375
+
+# Lowest noise level assumed, in sample units (16-bit quantisation noise), so digital silence
+# and the rounding residue of the sliding sums never count as tones standing out
+MIN_NOISE_RMS = 2.0 ** -15 / np.sqrt(12)
+
+# Floor for the logarithms of the Gaussian peak fit
+TINY = np.finfo(np.float64).tiny
+
+ToneDecision = namedtuple('ToneDecision', ['freqs', 'amps', 'margins', 'matches', 'unlock'])
+
+# Sliding DFT of a fixed set of bins over the last n samples.
+# X_k <- (X_k + x_new - x_old) * exp(2j*pi*k/n) per sample; a block of h samples is applied
+# at once as X_k * w^h + sum(d_i * w^(h-i+1)), so the cost is O(bins) per sample, independent of n.
+# Bins are phase-referenced to the first sample of the window, which lets a Hann window be
+# applied afterwards as 0.5*X_k - 0.25*(X_{k-1} + X_{k+1}).
+class SlidingDFT:
+    def __init__(self, n, bins, resync_blocks=DEFAULT_RESYNC_BLOCKS):
+        self.n = n
+        self.bins = np.asarray(bins)
+        self.resync_blocks = resync_blocks
+        # powers[:, p] = w_k^p for p = 0..n, and the same table reversed so that
+        # w^h, w^(h-1), ..., w^1 is the contiguous slice descending[:, n-h:n]
+        self.powers = np.exp(2j * np.pi * np.outer(self.bins, np.arange(n + 1)) / n)
+        self.descending = np.ascontiguousarray(self.powers[:, :0:-1])
+        # Direct DFT rows for the exact recomputation
+        self.basis = np.exp(-2j * np.pi * np.outer(self.bins, np.arange(n)) / n)
+        self.history = np.zeros(n)  # Circular buffer of the last n samples
+        self.position = 0           # Index of the oldest sample in history
+        self.spectrum = np.zeros(len(self.bins), dtype=np.complex128)
+        self.energy = 0.0           # Sum of squares of the last n samples
+        self.blocks = 0
+        self.samples = 0            # Total samples seen; the window is full once this reaches n
+
+    # Last n samples, oldest first
+    def window(self):
+        return np.roll(self.history, -self.position)
+
+    def resync(self):
+        frame = self.window()
+        self.spectrum = self.basis @ frame
+        self.energy = float(frame @ frame)
+
+    # Slide the window forward by the samples of one block (at most n samples)
+    def update(self, block):
+        block = np.asarray(block, dtype=np.float64)
+        h = len(block)
+        if h > self.n:
+            raise ValueError("Block is longer than the sliding window")
+        # Oldest h samples, replaced in place (two slices when the block wraps around)
+        first = min(h, self.n - self.position)
+        old = np.concatenate([self.history[self.position:self.position + first], self.history[:h - first]])
+        self.history[self.position:self.position + first] = block[:first]
+        self.history[:h - first] = block[first:]
+        self.position = (self.position + h) % self.n
+        self.samples += h
+
+        self.blocks += 1
+        if self.blocks % self.resync_blocks == 0:
+            self.resync()
+            return self.spectrum
+        self.spectrum *= self.powers[:, h]
+        self.spectrum += self.descending[:, self.n - h:] @ (block - old)
+        self.energy += float(block @ block - old @ old)
+        return self.spectrum
+
+# Door-unlock tone detector: tracks only the bins within ±tolerance of each target.
+# For every target it reports the strongest Hann-windowed peak in its band, interpolated to
+# sub-bin frequency (amplitude on the same scale as np.abs(rfft(frame * hann))), and that
+# amplitude over the noise floor, the mean Hann magnitude of the bins outside the bands
+# (known from the frame energy without computing them). A target matches when its peak beats
+# the floor by `margin`; the door unlocks when `required` targets match, i.e. the target
+# tones stand out as the frame's peaks as in the original top-3 peak test, also in broadband
+# noise (never before the first n samples have filled the window).
+class ToneDetector:
+    def __init__(self, fs, n, targets, tolerance, required=None,
+                 margin=DEFAULT_MARGIN):
+        self.fs = fs
+        self.n = n
+        self.targets = list(targets)
+        self.tolerance = tolerance
+        self.required = len(self.targets) if required is None else required
+        self.margin = margin
+
+        df = fs / n
+        bands = []
+        for target in self.targets:
+            low = max(1, int(np.ceil((target - tolerance) / df)))
+            high = min(n // 2 - 1, int(np.floor((target + tolerance) / df)))
+            if low > high:
+                raise ValueError(f"No FFT bin within ±{tolerance} Hz of {target} Hz for n={n}")
+            bands.append(np.arange(low, high + 1))
+
+        # Track each band plus two neighbours on both sides: one for the Hann combination and
+        # one more so the Hann magnitude is also known just outside the band for interpolation
+        tracked = np.unique(np.concatenate([np.arange(b[0] - 2, b[-1] + 3) for b in bands]))
+        self.sdft = SlidingDFT(n, tracked)
+        # All band bins back to back (positions in the tracked set) and the number of bins outside them
+        self.band_index = np.searchsorted(tracked, np.concatenate(bands))
+        self.other_bins = n // 2 + 1 - len(self.band_index)
+        self.min_floor = np.sqrt(HANN_POWER * n) * MIN_NOISE_RMS
+        # The same positions as a (targets x widest band) array; shorter bands are padded by
+        # repeating their last bin, which never wins the argmax over its first occurrence
+        width = max(len(b) for b in bands)
+        self.band_grid = np.array([np.searchsorted(tracked, np.pad(b, (0, width - len(b)), mode='edge'))
+                                   for b in bands])
+        self.band_freqs = [b * df for b in bands]
+        self.df = df
+        # Hann magnitudes of the tracked bins (the first and last entries are unused), reused per hop
+        self.hann = np.empty(len(tracked))
+        self.rows = np.arange(len(bands))
+        self.around = np.array([-1, 0, 1])
+
+    # Feed one block of raw (unwindowed) samples and return the decision for the newest window
+    def process(self, block):
+        X = self.sdft.update(block)
+        energy = self.sdft.energy
+        # Hann combination of every tracked bin with its neighbours in one pass
+        hann = self.hann
+        np.abs(0.5 * X[1:-1] - 0.25 * (X[:-2] + X[2:]), out=hann[1:-1])
+        peaks = self.band_grid[self.rows, np.argmax(hann[self.band_grid], axis=1)]
+
+        # Hann magnitudes around each band's strongest bin, refined to a sub-bin peak; a bin at
+        # the band edge that is not a local maximum keeps its own frequency and amplitude
+        # (Gaussian fit of interpolate_peaks, inlined: a call costs more than the three fits)
+        neighbourhood = hann[peaks[:, None] + self.around]
+        a, b, c = neighbourhood.T
+        local = (b > a) & (b >= c)
+        la, lb, lc = np.log(np.maximum(neighbourhood, TINY)).T
+        offsets = np.divide(0.5 * (la - lc), la - 2 * lb + lc, out=np.zeros(len(peaks)), where=local)
+        freqs = (self.sdft.bins[peaks] + offsets) * self.df
+        amps = np.where(local, np.exp(lb - 0.25 * (la - lc) * offsets), b)
+
+        # Out-of-band noise floor from Parseval: the one-sided power sum(|X_k|^2) = n/2 * sum(x^2)
+        # less the band bins, spread over the remaining bins and scaled to a Hann magnitude
+        band = X[self.band_index]
+        rest = 0.5 * self.n * energy - np.vdot(band, band).real
+        floor = max(math.sqrt(HANN_POWER * max(rest, 0.0) / self.other_bins), self.min_floor)
+        margins = amps / floor
+
+        matches = margins >= self.margin
+        unlock = bool(self.sdft.samples >= self.n and matches.sum() >= self.required)
+        return ToneDecision(freqs, amps, margins, matches.tolist(), unlock)
+
+    # Last n samples, oldest first (for plotting the full spectrum of the current window)
+    def window(self):
+        return self.sdft.window()
@@ -0,0 +1,120 @@
+import struct
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# WAVE format tags handled by the memory-mapped reader
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# Default number of STFT frames converted per chunk; memory use depends on this, not the file length
+DEFAULT_FRAMES_PER_CHUNK = 256
+
+# Walk the RIFF chunks of a .wav file and return (format tag, channels, samplerate,
+# bits per sample, data offset, data size) without reading the sample data
+def read_wav_header(path):
+    with open(path, 'rb') as f:
+        riff, _, wave = struct.unpack('<4sI4s', f.read(12))
+        if riff != b'RIFF' or wave != b'WAVE':
+            raise ValueError(f"{path} is not a RIFF/WAVE file")
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"{path} has no data chunk")
+            chunk_id, size = struct.unpack('<4sI', header)
+            if chunk_id == b'fmt ':
+                body = f.read(size)
+                tag, channels, samplerate, _, _, bits = struct.unpack('<HHIIHH', body[:16])
+                if tag == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                    tag = struct.unpack('<H', body[24:26])[0]  # First two bytes of the sub-format GUID
+                fmt = (tag, channels, samplerate, bits)
+            elif chunk_id == b'data':
+                if fmt is None:
+                    raise ValueError(f"{path} has a data chunk before its fmt chunk")
+                return fmt + (f.tell(), size)
+            else:
+                f.seek(size, 1)
+            if size % 2:
+                f.seek(1, 1)  # Chunks are word aligned
+
+# Sample dtype stored on disk for a (format tag, bits per sample) pair
+def wav_sample_dtype(tag, bits):
+    if tag == WAVE_FORMAT_PCM and bits == 16:
+        return np.dtype('<i2')
+    if tag == WAVE_FORMAT_PCM and bits == 32:
+        return np.dtype('<i4')
+    if tag == WAVE_FORMAT_IEEE_FLOAT and bits == 32:
+        return np.dtype('<f4')
+    if tag == WAVE_FORMAT_IEEE_FLOAT and bits == 64:
+        return np.dtype('<f8')
+    return None
+
+# Lazy reader for large .wav recordings: the PCM data chunk is memory-mapped and
+# converted to float one chunk at a time, so peak memory does not grow with file length.
+# Files the memory map cannot handle (8/24-bit PCM, compressed formats) are read in
+# blocks through soundfile instead.
+class WavStream:
+    def __init__(self, path):
+        self.path = path
+        tag, self.channels, self.samplerate, bits, offset, size = read_wav_header(path)
+        self.sample_dtype = wav_sample_dtype(tag, bits)
+        if self.sample_dtype is not None:
+            self.frames = size // (self.sample_dtype.itemsize * self.channels)
+            self.data = np.memmap(path, dtype=self.sample_dtype, mode='r', offset=offset,
+                                  shape=(self.frames, self.channels))
+        else:
+            import soundfile as sf
+            self.data = None
+            self.frames = sf.info(path).frames
+
+    @property
+    def duration(self):
+        return self.frames / self.samplerate
+
+    # Convert raw samples to float in [-1, 1) (integer PCM is scaled by its full range)
+    def to_float(self, raw, dtype):
+        if raw.dtype.kind == 'i':
+            scale = dtype(1.0 / (1 << (8 * raw.dtype.itemsize - 1)))
+            return np.multiply(raw, scale, dtype=dtype)
+        return raw.astype(dtype, copy=False)
+
+    # Samples start..stop of one channel (or all channels when channel is None) as float,
+    # or as raw integers when an integer dtype such as np.int16 is requested
+    def read(self, start, stop, channel=0, dtype=np.float32):
+        if self.data is not None and np.dtype(dtype).kind == 'i':
+            raw = self.data[start:stop] if channel is None else self.data[start:stop, channel]
+            return np.array(raw, dtype=dtype)
+        if self.data is None:
+            import soundfile as sf
+            block, _ = sf.read(self.path, start=start, stop=stop, dtype=np.dtype(dtype).name, always_2d=True)
+            return block if channel is None else block[:, channel]
+        raw = self.data[start:stop] if channel is None else self.data[start:stop, channel]
+        return self.to_float(raw, np.dtype(dtype).type)
+
+    # Consecutive blocks of block_size samples (the last one may be shorter)
+    def blocks(self, block_size, channel=0, dtype=np.float32):
+        for start in range(0, self.frames, block_size):
+            yield self.read(start, min(start + block_size, self.frames), channel, dtype)
+
+    # (frames x n_fft) arrays of overlapping STFT frames, frames_per_chunk at a time.
+    # Each chunk re-reads the n_fft - hop samples it shares with the previous one,
+    # so frames that straddle chunk boundaries come out exactly as in frame_signal.
+    # With channel=None the chunks are (frames x channels x n_fft), every channel at once.
+    def frame_chunks(self, n_fft, hop, channel=0, dtype=np.float32, frames_per_chunk=DEFAULT_FRAMES_PER_CHUNK):
+        total = 0 if self.frames < n_fft else (self.frames - n_fft) // hop + 1
+        for first in range(0, total, frames_per_chunk):
+            count = min(frames_per_chunk, total - first)
+            start = first * hop
+            samples = self.read(start, start + (count - 1) * hop + n_fft, channel, dtype)
+            yield sliding_window_view(samples, n_fft, axis=0)[::hop]
+
+    # Individual overlapping frames, produced lazily
+    def iter_frames(self, n_fft, hop, channel=0, dtype=np.float32):
+        for chunk in self.frame_chunks(n_fft, hop, channel, dtype):
+            yield from chunk
+
+    def __repr__(self):
+        return (f"WavStream({self.path!r}, samplerate={self.samplerate}, channels={self.channels}, "
+                f"frames={self.frames})")
@@ -0,0 +1,152 @@
+import glob
+import hashlib
+import json
+import os
+import platform
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from .backends import Backend, available_backends, load_backend
+
+# Wisdom file location: $COOLEY_TUKEY_WISDOM, or wisdom.json in the user's cache directory
+WISDOM_ENV_VAR = 'COOLEY_TUKEY_WISDOM'
+DEFAULT_WISDOM_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'cooley_tukey', 'wisdom.json')
+
+# Timed rounds per candidate (the best counts), each of up to TUNE_CALLS calls or about
+# TUNE_ROUND_SECONDS, so slow candidates on large shapes do not stall the first run
+TUNE_ROUNDS = 3
+TUNE_CALLS = 10
+TUNE_ROUND_SECONDS = 0.01
+
+# Batch sizes are recorded per power of two, so 200 and 256 frames share an entry
+def batch_bucket(batch):
+    return 1 if batch <= 1 else 1 << (int(batch) - 1).bit_length()
+
+# Hash of the package sources plus the numpy/scipy versions: any change to the engines
+# (or the libraries they race against) makes old measurements meaningless
+def library_fingerprint():
+    digest = hashlib.sha1()
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(__file__), '*.py'))):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    versions = [f"numpy {np.__version__}"]
+    try:
+        import scipy
+        versions.append(f"scipy {scipy.__version__}")
+    except ImportError:
+        pass
+    return f"{digest.hexdigest()[:16]} ({', '.join(versions)})"
+
+def cpu_fingerprint():
+    model = platform.processor()
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith('model name'):
+                    model = line.split(':', 1)[1].strip()
+                    break
+    except OSError:
+        pass
+    return f"{platform.system()} {platform.machine()} {model} x{os.cpu_count()}"
+
+# Picks the fastest backend per (kind, N, dtype, batch) and remembers it on disk.
+# The first request for a key times every available backend on that exact shape and saves
+# the winner; later requests (in this or any later process) dispatch straight to it.
+# A file written for another library fingerprint or CPU is ignored and rewritten.
+class Autotuner:
+    def __init__(self, path=None, candidates=None):
+        self.path = path or os.environ.get(WISDOM_ENV_VAR) or DEFAULT_WISDOM_PATH
+        self.candidates = candidates
+        self.library = library_fingerprint()
+        self.cpu = cpu_fingerprint()
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.measured = 0  # Keys timed by this process (0 once the wisdom is warm)
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('library') == self.library and data.get('cpu') == self.cpu:
+            self.entries = data.get('entries', {})
+
+    # Atomic rewrite, so a concurrent reader never sees a half-written file
+    def save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        data = {'library': self.library, 'cpu': self.cpu, 'entries': self.entries}
+        fd, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(temporary, self.path)
+
+    @staticmethod
+    def key(kind, n, dtype, batch):
+        return f"{kind}/{n}/{np.dtype(dtype).name}/{batch_bucket(batch)}"
+
+    # Name of the fastest backend for this shape, measuring it first if it is not known yet
+    def best(self, kind, n, dtype=np.float64, batch=1):
+        key = self.key(kind, n, dtype, batch)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry['backend'] not in self.candidate_names():
+                entry = self.measure(kind, n, dtype, batch_bucket(batch))
+                self.entries[key] = entry
+                self.measured += 1
+                try:
+                    self.save()
+                except OSError:
+                    pass  # Read-only location: keep the result for this process only
+        return entry['backend']
+
+    def candidate_names(self):
+        return self.candidates if self.candidates is not None else available_backends()
+
+    # Time every candidate on a random input of the requested shape
+    def measure(self, kind, n, dtype, batch):
+        rng = np.random.default_rng(0)
+        shape = (batch, n) if batch > 1 else (n,)
+        x = rng.standard_normal(shape)
+        if kind == 'fft':
+            x = x + 1j * rng.standard_normal(shape)
+        x = x.astype(dtype)
+
+        timings = {}
+        for name in self.candidate_names():
+            backend = load_backend(name)
+            plan = backend.rfft_plan(n, dtype) if kind == 'rfft' else backend.fft_plan(n, dtype)
+            run = plan.execute_batch if batch > 1 else plan.execute
+            start = time.perf_counter()
+            run(x)  # Warm-up: plan tables, caches, thread pools
+            calls = min(TUNE_CALLS, max(1, int(TUNE_ROUND_SECONDS / (time.perf_counter() - start))))
+            rounds = []
+            for _ in range(TUNE_ROUNDS):
+                start = time.perf_counter()
+                for _ in range(calls):
+                    run(x)
+                rounds.append((time.perf_counter() - start) / calls)
+            timings[name] = min(rounds)
+        winner = min(timings, key=timings.get)
+        return {'backend': winner, 'seconds': timings}
+
+    def plan(self, kind, n, dtype=np.float64, batch=1):
+        backend = load_backend(self.best(kind, n, dtype, batch))
+        return backend.rfft_plan(n, dtype) if kind == 'rfft' else backend.fft_plan(n, dtype)
+
+# Backend whose plans come from the autotuner; rfft_plan/fft_plan take the expected batch size
+class TunedBackend(Backend):
+    def __init__(self, autotuner=None):
+        self.autotuner = autotuner or Autotuner()
+        super().__init__('tuned', None, None)
+
+    def rfft_plan(self, n, dtype=np.float64, batch=1):
+        return self.autotuner.plan('rfft', n, dtype, batch)
+
+    def fft_plan(self, n, dtype=np.complex128, batch=1):
+        return self.autotuner.plan('fft', n, dtype, batch)
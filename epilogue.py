@@ -1,23 +1,8 @@
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.signal import windows
 import serial
-import struct
-import time
 
-# Function to map ADC value (0-4095) to voltage (0-5V)
-def map_adc_value_to_voltage(adc_value):
-    max_adc_value = 4095
-    max_voltage = 5
-    return (adc_value / max_adc_value) * max_voltage
-
-# Function to pad the signal to the nearest power of 2
-def pad_to_power_of_two(signal):
-    N = len(signal)
-    next_power_of_two = 2**int(np.ceil(np.log2(N)))
-    padded_signal = np.zeros(next_power_of_two)
-    padded_signal[:N] = signal
-    return padded_signal
+from cooley_tukey import BandMapper, SerialBlockReader, SpectrumRenderer, find_peaks, get_backend
 
 # Serial port settings
 ser = serial.Serial('COM3', baudrate=115200, timeout=1)
@@ -25,84 +10,62 @@ ser = serial.Serial('COM3', baudrate=115200, timeout=1)
 # Signal and FFT settings
 fs = 44100  # Sampling rate (set as needed for your ADC)
 n_fft = 2048
-window = windows.hann(n_fft)
+window = np.hanning(n_fft)
+plan = get_backend().rfft_plan(n_fft)  # FFT backend from $COOLEY_TUKEY_BACKEND (custom by default)
 
 # Real-time plot setup
 plt.ion()
 fig, (ax, ax_table) = plt.subplots(2, 1, figsize=(12, 8), gridspec_kw={'height_ratios': [3, 1]})
 freqs = np.fft.rfftfreq(n_fft, 1/fs)
-data_buffer = np.zeros(n_fft)
+
+# Focus on 0 Hz to 6000 Hz in 61 bars, each the mean of the bins in its band; bars and table are created once
+bars = BandMapper(n_fft, fs, 61, 0, 6000)
+# Bin range searched for peaks
+peak_lo, peak_hi = np.flatnonzero(freqs <= 6000)[[0, -1]]
+renderer = SpectrumRenderer(ax, ax_table, **bars.plot_options(), ylim=(0, 5000),
+                            title='Real-Time FFT Spectrum (0 Hz to 6000 Hz) with 61 Bars')
+
+# Background thread reading whole n_fft-sample blocks (one read and one big-endian uint16
+# decode per block, mapped from ADC counts 0-4095 to 0-5 V) into a bounded queue
+reader = SerialBlockReader(ser, n_fft).start()
 
 try:
     while True:
-        # Collect data from serial port until buffer is filled
-        for i in range(n_fft):
-            raw_data = ser.read(2)
-            if len(raw_data) == 2:
-                # Convert the 2-byte data into a 16-bit integer
-                adc_value = struct.unpack('>H', raw_data)[0]
-                voltage = map_adc_value_to_voltage(adc_value)  # Map ADC value to voltage
-                data_buffer[i] = voltage
-
-                print(voltage)
-            else:
-                print("Data not available. Check connection.")
-                break
+        # Next block of voltages from the reader thread
+        data_buffer = reader.get(timeout=1)
+        if data_buffer is None:
+            print("Data not available. Check connection.")
+            renderer.idle(0.01)
+            continue
 
         # Apply window function and pad the segment
         segment = data_buffer * window
-        padded_segment = pad_to_power_of_two(segment)
-        
-        # FFT processing with numpy's rfft for real values
-        fft_values = np.abs(np.fft.rfft(padded_segment))
-        smoothed_fft_values = np.convolve(fft_values, np.ones(5) / 5, mode='same')
+        padded_segment = plan.pad(segment)
 
-        # Focus on 0 Hz to 6000 Hz
-        valid_indices = (freqs >= 0) & (freqs <= 6000)
-        freqs_focus = freqs[valid_indices]
-        fft_values_focus = smoothed_fft_values[valid_indices]
-        
-        # Reduce to 61 points
-        indices = np.linspace(0, len(freqs_focus) - 1, 61, dtype=int)
-        reduced_freqs = freqs_focus[indices]
-        reduced_fft_values = fft_values_focus[indices]
+        # Real-input FFT of the selected backend
+        fft_values = np.abs(plan.execute(padded_segment))
 
-        # Top 4 frequency-amplitude pairs
-        top_indices = np.argsort(reduced_fft_values)[-4:][::-1]
-        top_freqs = reduced_freqs[top_indices]
-        top_amps = reduced_fft_values[top_indices]
+        # Top 4 peaks of the full-resolution spectrum, refined to sub-bin frequency and amplitude
+        peak_bins, top_amps = find_peaks(fft_values, 4, min_distance=3, lo=peak_lo, hi=peak_hi + 1)
+        top_freqs = peak_bins * freqs[1]
 
-        max_amp = np.max(reduced_fft_values)
+        max_amp = np.max(top_amps, initial=0)
         top_percentages = (top_amps / max_amp) * 100 if max_amp > 0 else [0] * len(top_amps)
 
         # Table data
         table_data = [[f"{freq:.2f} Hz", f"{amp:.2f}", f"{percent:.2f} %"]
                       for freq, amp, percent in zip(top_freqs, top_amps, top_percentages)]
 
-        # Update plots and tables
-        ax.clear()
-        ax_table.clear()
-        ax.bar(reduced_freqs, reduced_fft_values, width=(reduced_freqs[1] - reduced_freqs[0]), align='center')
-        ax.set_xlim(0, 6000)
-        ax.set_ylim(0, 5000)
-        ax.set_xlabel('Frequency (Hz)')
-        ax.set_ylabel('Amplitude')
-        ax.set_title('Real-Time FFT Spectrum (0 Hz to 6000 Hz) with 61 Bars')
-
-        # Display table
-        ax_table.axis('tight')
-        ax_table.axis('off')
-        table = ax_table.table(cellText=table_data, colLabels=["Frequency", "Amplitude", "% of Max"], loc='center')
-        table.auto_set_font_size(False)
-        table.set_fontsize(10)
-        table.scale(1, 1.5)
-
-        plt.pause(0.04)  # Smooth update interval
+        # Update the bars and table in place (blitted at most at the renderer's frame rate)
+        renderer.update(bars(fft_values), table_data)
+        renderer.draw_if_due()
 
 except KeyboardInterrupt:
     print("Stopped by user")
 
 finally:
+    reader.stop()
+    print(reader.stats())
     ser.close()
     plt.ioff()
     plt.show()
@@ -0,0 +1,78 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from cooley_tukey import WavStream, find_peaks
+from cooley_tukey.outofcore import DEFAULT_MEMORY_BUDGET, out_of_core_fft
+
+# One FFT over a whole recording, however long: the channel is read through a memory map
+# and transformed out of core (cooley_tukey.outofcore), the spectrum goes to a .npy file.
+#   python full_spectrum.py input.wav -o spectrum.npy --memory 512M
+#   spectrum = np.load('spectrum.npy', mmap_mode='r')
+
+# Bins scanned at a time when looking for the strongest peaks
+SCAN_CHUNK = 2**22
+
+# "512M", "2G", "65536" -> bytes
+def parse_size(text):
+    units = {'K': 2**10, 'M': 2**20, 'G': 2**30}
+    text = text.strip().upper().rstrip('B')
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+# The `count` strongest peaks among bins 1..stop-1 (fractional bins, amplitudes), found with
+# find_peaks one chunk at a time so only SCAN_CHUNK magnitudes are in memory
+def strongest_peaks(spectrum, count, stop):
+    positions = np.empty(0)
+    amps = np.empty(0)
+    for start in range(0, stop, SCAN_CHUNK):
+        values = np.abs(spectrum[start:min(start + SCAN_CHUNK, stop)])
+        chunk_positions, chunk_amps = find_peaks(values, count, min_distance=3)
+        positions = np.concatenate([positions, chunk_positions + start])
+        amps = np.concatenate([amps, chunk_amps])
+        keep = np.argsort(amps)[::-1][:count]
+        positions, amps = positions[keep], amps[keep]
+    return positions, amps
+
+# Copy a channel the memory map cannot reach (compressed or unusual formats) to a temporary .npy
+def channel_on_disk(wav, channel, directory):
+    path = os.path.join(directory, 'channel.npy')
+    samples = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=(wav.frames,))
+    position = 0
+    for block in wav.blocks(2**20, channel):
+        samples[position:position + len(block)] = block
+        position += len(block)
+    samples.flush()
+    return samples
+
+parser = argparse.ArgumentParser(description="FFT of an entire recording with a bounded memory footprint")
+parser.add_argument('input', help=".wav file")
+parser.add_argument('-o', '--output', default='spectrum.npy', help="memory-mapped .npy file for the complex spectrum")
+parser.add_argument('--channel', type=int, default=0)
+parser.add_argument('--memory', type=parse_size, default=DEFAULT_MEMORY_BUDGET,
+                    help="bytes of tile data held in memory, e.g. 512M (default: 256M)")
+parser.add_argument('--pad', action='store_true', help="zero-pad to the next power of two")
+parser.add_argument('--threads', type=int, default=None, help="threads per tile transform")
+parser.add_argument('--peaks', type=int, default=4, help="strongest peaks to print")
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    wav = WavStream(args.input)
+    with tempfile.TemporaryDirectory() as directory:
+        # Raw PCM samples are transformed straight from the file's memory map (in sample units)
+        samples = wav.data[:, args.channel] if wav.data is not None else channel_on_disk(wav, args.channel, directory)
+        n = 1 << (len(samples) - 1).bit_length() if args.pad else len(samples)
+
+        start = time.perf_counter()
+        spectrum = out_of_core_fft(samples, args.output, n, args.memory, threads=args.threads)
+        elapsed = time.perf_counter() - start
+
+    print(f"{args.input}: {n} points ({wav.duration:.1f} s) in {elapsed:.1f} s, "
+          f"{wav.samplerate / n:.6f} Hz per bin -> {args.output}")
+    positions, amps = strongest_peaks(spectrum, args.peaks, n // 2 + 1)
+    for k, amp in zip(positions, amps):
+        print(f"{k * wav.samplerate / n:12.4f} Hz  {amp:.4g}")
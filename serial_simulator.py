@@ -0,0 +1,50 @@
+import argparse
+import os
+import time
+import tty
+
+import numpy as np
+
+from cooley_tukey import encode_frame
+
+# Stand-in for the device on COM3: opens a pseudo-terminal and streams framed int16 samples
+# of a test tone into it. Point chapter06 at the printed device path:
+#   python serial_simulator.py --corrupt 0.01
+#   python chapter06.py --port /dev/pts/N
+parser = argparse.ArgumentParser(description="Stream framed test samples into a pty (POSIX only)")
+parser.add_argument('--fs', type=int, default=44100, help="sample rate the frames are paced at")
+parser.add_argument('--frame-samples', type=int, default=256, help="samples per frame")
+parser.add_argument('--freqs', type=float, nargs='+', default=[1000, 2000, 3000], help="test tone frequencies (Hz)")
+parser.add_argument('--corrupt', type=float, default=0.0, help="probability that a frame gets a flipped or dropped byte")
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    master, slave = os.openpty()
+    tty.setraw(slave)  # No line discipline: bytes pass through unchanged
+    print(f"Streaming on {os.ttyname(slave)} (Ctrl+C to stop)")
+
+    rng = np.random.default_rng()
+    n = args.frame_samples
+    start = time.perf_counter()
+    sent = corrupted = 0
+    try:
+        while True:
+            t = (sent * n + np.arange(n)) / args.fs
+            signal = sum(np.sin(2 * np.pi * f * t) for f in args.freqs) / len(args.freqs)
+            frame = bytearray(encode_frame(np.round(signal * 32000)))
+            if rng.random() < args.corrupt:
+                corrupted += 1
+                position = rng.integers(len(frame))
+                if rng.random() < 0.5:
+                    frame[position] ^= 0xFF
+                else:
+                    del frame[position]
+            os.write(master, frame)
+            sent += 1
+
+            # Pace the frames at the sample rate
+            delay = start + sent * n / args.fs - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    except KeyboardInterrupt:
+        print(f"Sent {sent} frames ({corrupted} corrupted)")